@@ -4,7 +4,11 @@ A collection of utilities for PDF operations
 """
 
 from .pdf_splitter import PDFSplitter
+from .pdf_merger import PDFMerger
+from .split_plan import SplitPlan
+from .page_index import PageIndex
+from .pdf_images import ImageRecompressor
+from .progress import ProgressEvent, ProgressBar
 
-__all__ = ['PDFSplitter']
+__all__ = ['PDFSplitter', 'PDFMerger', 'SplitPlan', 'PageIndex', 'ImageRecompressor', 'ProgressEvent', 'ProgressBar']
 __version__ = '1.0.0'
-
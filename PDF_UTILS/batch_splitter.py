@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Batch PDF Splitter
+Applies one split policy to every PDF in a directory tree, in parallel, and
+records what was done in a JSON manifest so later runs skip unchanged files
+
+Usage:
+    python batch_splitter.py incoming/ --out split/ --parts 4 --workers 8
+    python batch_splitter.py incoming/ --out split/ --ranges 1-2,3-10
+    python batch_splitter.py incoming/ --out split/ --max-mb 10 --optimize
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Optional, List, Tuple, Dict
+
+from PyPDF2 import PdfReader
+
+try:
+    from .pdf_splitter import PDFSplitter
+    from .split_plan import SplitPlan
+except ImportError:
+    from pdf_splitter import PDFSplitter
+    from split_plan import SplitPlan
+
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+
+def find_pdfs(input_dir: str) -> List[str]:
+    """
+    Find every PDF under a directory, recursively.
+    
+    Args:
+        input_dir (str): Directory to search
+    
+    Returns:
+        List[str]: Paths of the PDFs, relative to input_dir, sorted
+    """
+    found = []
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for name in files:
+            if name.lower().endswith('.pdf'):
+                found.append(os.path.relpath(os.path.join(root, name), input_dir))
+    return sorted(found)
+
+
+def _plan_for(policy: Dict) -> Optional[SplitPlan]:
+    """Build the SplitPlan for a policy, or None for policies that aren't plan-based"""
+    mode = policy['mode']
+    if mode == 'two':
+        return SplitPlan().add_split_into_two(policy.get('split_at_page'))
+    if mode == 'parts':
+        return SplitPlan().add_split_into_n_parts(policy['n_parts'])
+    if mode == 'ranges':
+        return SplitPlan().add_ranges([tuple(r) for r in policy['ranges']])
+    return None
+
+
+def split_file(pdf_path: str, output_dir: str, policy: Dict) -> Dict:
+    """
+    Split one PDF according to a policy. Runs in a worker process.
+    
+    Args:
+        pdf_path (str): PDF to split
+        output_dir (str): Directory for its parts
+        policy (Dict): Split policy, see policy_from_args()
+    
+    Returns:
+        Dict: pages, outputs (file and 1-based page range of each part) and seconds
+    """
+    start = time.perf_counter()
+    with PDFSplitter(pdf_path, quiet=True) as splitter:
+        plan = _plan_for(policy)
+        if plan is not None:
+            resolved = plan.resolve(splitter.total_pages, pdf_path, output_dir)
+            splitter.run_plan(plan, output_dir=output_dir, optimize=policy.get('optimize', False))
+            outputs = [{'file': output_file, 'pages': [page_indices[0] + 1, page_indices[-1] + 1]}
+                       for page_indices, output_file, _ in resolved]
+        elif policy['mode'] == 'max_bytes':
+            files = splitter.split_by_max_bytes(policy['max_bytes'], output_dir=output_dir,
+                                                optimize=policy.get('optimize', False))
+            # Parts are consecutive, so their page ranges follow from their page counts
+            outputs = []
+            first = 1
+            for output_file in files:
+                count = len(PdfReader(output_file).pages)
+                outputs.append({'file': output_file, 'pages': [first, first + count - 1]})
+                first += count
+        else:
+            raise ValueError(f"Unknown split mode: {policy['mode']}")
+        pages = splitter.total_pages
+    
+    return {'pages': pages, 'outputs': outputs, 'seconds': round(time.perf_counter() - start, 3)}
+
+
+def load_manifest(manifest_path: str) -> Dict:
+    """Load a manifest, or return an empty one if it doesn't exist yet"""
+    if not os.path.exists(manifest_path):
+        return {'version': MANIFEST_VERSION, 'files': {}}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: Dict, manifest_path: str) -> None:
+    """Write the manifest through a temporary file so a crash never leaves it half-written"""
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def is_unchanged(entry: Optional[Dict], stat: os.stat_result, policy: Dict) -> bool:
+    """Check whether a manifest entry is a successful run of the same policy on the same file"""
+    return (entry is not None
+            and 'error' not in entry
+            and entry.get('size') == stat.st_size
+            and entry.get('mtime') == stat.st_mtime
+            and entry.get('policy') == policy)
+
+
+def run_batch(input_dir: str, output_dir: str, policy: Dict, workers: int = 1,
+              manifest_path: Optional[str] = None, force: bool = False) -> Dict:
+    """
+    Split every PDF under input_dir with the same policy.
+    
+    Files are handed to a pool of worker processes largest first, so one big
+    file picked up last doesn't leave the other workers idle. Outputs mirror
+    the input tree under output_dir. The manifest is saved after every file,
+    so an interrupted run resumes where it stopped.
+    
+    Args:
+        input_dir (str): Directory tree containing the PDFs
+        output_dir (str): Directory tree the parts are written to
+        policy (Dict): Split policy, see policy_from_args()
+        workers (int): Number of worker processes
+        manifest_path (str, optional): Manifest location. Defaults to
+                                       manifest.json in output_dir.
+        force (bool): Split every file, even ones the manifest says are done
+    
+    Returns:
+        Dict: Counts of files split, skipped and failed, and the manifest path
+    """
+    if not os.path.isdir(input_dir):
+        raise FileNotFoundError(f"Input directory not found: {input_dir}")
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    
+    os.makedirs(output_dir, exist_ok=True)
+    if manifest_path is None:
+        manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    
+    todo = []
+    skipped = 0
+    for rel_path in find_pdfs(input_dir):
+        stat = os.stat(os.path.join(input_dir, rel_path))
+        if not force and is_unchanged(manifest['files'].get(rel_path), stat, policy):
+            skipped += 1
+            continue
+        todo.append((rel_path, stat))
+    
+    # Largest first: the pool starts tasks in submission order
+    todo.sort(key=lambda item: item[1].st_size, reverse=True)
+    print(f"📂 {len(todo)} PDFs to split, {skipped} unchanged since the last run")
+    
+    done = failed = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for rel_path, stat in todo:
+            target_dir = os.path.join(output_dir, os.path.dirname(rel_path))
+            future = pool.submit(split_file, os.path.join(input_dir, rel_path), target_dir, policy)
+            futures[future] = (rel_path, stat)
+        
+        for future in as_completed(futures):
+            rel_path, stat = futures[future]
+            entry = {'size': stat.st_size, 'mtime': stat.st_mtime, 'policy': policy,
+                     'finished_at': datetime.now().isoformat(timespec='seconds')}
+            try:
+                entry.update(future.result())
+                done += 1
+                print(f"  ✓ {rel_path}: {entry['pages']} pages → {len(entry['outputs'])} files "
+                      f"({entry['seconds']:.2f}s)")
+            except Exception as e:
+                entry['error'] = str(e)
+                failed += 1
+                print(f"  ❌ {rel_path}: {e}")
+            
+            manifest['files'][rel_path] = entry
+            save_manifest(manifest, manifest_path)
+    
+    manifest['last_run'] = {
+        'finished_at': datetime.now().isoformat(timespec='seconds'),
+        'split': done, 'skipped': skipped, 'failed': failed, 'workers': workers,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+    save_manifest(manifest, manifest_path)
+    return {'split': done, 'skipped': skipped, 'failed': failed, 'manifest': manifest_path}
+
+
+def parse_ranges(text: str) -> List[Tuple[int, int]]:
+    """Parse '1-5,6-10' into [(1, 5), (6, 10)]"""
+    ranges = []
+    for range_str in text.split(','):
+        start, _, end = range_str.strip().partition('-')
+        ranges.append((int(start), int(end or start)))
+    return ranges
+
+
+def policy_from_args(args) -> Dict:
+    """Turn the command-line options into a JSON-serializable split policy"""
+    if args.two:
+        policy = {'mode': 'two', 'split_at_page': args.split_at}
+    elif args.parts:
+        policy = {'mode': 'parts', 'n_parts': args.parts}
+    elif args.ranges:
+        policy = {'mode': 'ranges', 'ranges': [list(r) for r in parse_ranges(args.ranges)]}
+    else:
+        policy = {'mode': 'max_bytes', 'max_bytes': int(args.max_mb * 1024 * 1024)}
+    policy['optimize'] = args.optimize
+    return policy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split every PDF in a directory tree")
+    parser.add_argument('input_dir', help='directory containing the PDFs (searched recursively)')
+    parser.add_argument('--out', required=True, help='directory to write the parts to')
+    
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--two', action='store_true', help='split each PDF into two parts')
+    mode.add_argument('--parts', type=int, help='split each PDF into N equal parts')
+    mode.add_argument('--ranges', help="page ranges, e.g. '1-2,3-10'")
+    mode.add_argument('--max-mb', type=float, help='split into parts of at most this many MB')
+    
+    parser.add_argument('--split-at', type=int, help='page to split at with --two (default: middle)')
+    parser.add_argument('--optimize', action='store_true', help='deduplicate and compress the parts')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--manifest', help=f'manifest path (default: OUT/{MANIFEST_NAME})')
+    parser.add_argument('--force', action='store_true', help='split files even if they are unchanged')
+    
+    args = parser.parse_args()
+    result = run_batch(args.input_dir, args.out, policy_from_args(args), workers=args.workers,
+                       manifest_path=args.manifest, force=args.force)
+    
+    print(f"✓ Split {result['split']} files, skipped {result['skipped']}, "
+          f"{result['failed']} failed. Manifest: {result['manifest']}")
+    return 1 if result['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Memory Benchmark - path-based open vs memory-mapped input
+Runs several splitters on the same PDF at once and compares their memory use
+
+Peak RSS counts mapped file pages in every process that touched them, even
+though the kernel keeps a single copy in the page cache. The private memory
+column (Linux only) leaves those shared pages out and shows what the
+concurrent splitters really cost together.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+from pdf_splitter import PDFSplitter
+
+
+MODES = ('path', 'mmap')
+
+
+def read_private_kb():
+    """Return this process's private (unshared) memory in KB, or None if unavailable"""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+    except OSError:
+        return None
+    return sum(int(fields[key].split()[0]) for key in ('Private_Clean', 'Private_Dirty'))
+
+
+def peak_rss_kb():
+    """Return this process's peak RSS in KB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_child(pdf_path, mode, n_parts):
+    """Open the PDF in the given mode, split it, and print memory stats as JSON"""
+    with tempfile.TemporaryDirectory() as output_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            with PDFSplitter(pdf_path, use_mmap=(mode == 'mmap')) as splitter:
+                splitter.split_into_n_parts(n_parts, output_dir=output_dir)
+                private_kb = read_private_kb()
+
+    print(json.dumps({'peak_rss_kb': peak_rss_kb(), 'private_kb': private_kb}))
+
+
+def run_mode(pdf_path, mode, processes, n_parts):
+    """Run several child splitters concurrently and collect their stats"""
+    children = [
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), pdf_path,
+             '--child', mode, '--parts', str(n_parts)],
+            stdout=subprocess.PIPE, text=True,
+        )
+        for _ in range(processes)
+    ]
+
+    stats = []
+    for child in children:
+        out, _ = child.communicate()
+        if child.returncode != 0:
+            raise RuntimeError(f"{mode} child exited with code {child.returncode}")
+        stats.append(json.loads(out))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('pdf_path', help='PDF file to split')
+    parser.add_argument('--processes', type=int, default=4,
+                        help='number of concurrent splitters (default: 4)')
+    parser.add_argument('--parts', type=int, default=2,
+                        help='number of parts each splitter writes (default: 2)')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.pdf_path, args.child, args.parts)
+        return
+
+    size_mb = os.path.getsize(args.pdf_path) / (1024 * 1024)
+    print(f"📄 {args.pdf_path} ({size_mb:.1f} MB), "
+          f"{args.processes} concurrent splitters, {args.parts} parts each\n")
+
+    totals = {}
+    for mode in MODES:
+        stats = run_mode(args.pdf_path, mode, args.processes, args.parts)
+        peak = max(s['peak_rss_kb'] for s in stats)
+        total = sum(s['peak_rss_kb'] for s in stats)
+        print(f"  {mode:>4}: peak RSS per process {peak / 1024:8.1f} MB, "
+              f"sum {total / 1024:8.1f} MB", end='')
+        if all(s['private_kb'] is not None for s in stats):
+            private = sum(s['private_kb'] for s in stats)
+            totals[mode] = ('private memory', private)
+            print(f", private {private / 1024:8.1f} MB")
+        else:
+            totals[mode] = ('peak RSS', total)
+            print()
+
+    label, path_kb = totals['path']
+    saved = path_kb - totals['mmap'][1]
+    print(f"\n✓ mmap saved {saved / 1024:.1f} MB of summed {label} "
+          f"({saved / path_kb * 100:.0f}%)")
+
+if __name__ == "__main__":
+    main()
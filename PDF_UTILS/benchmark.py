@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+PDF Splitter Benchmark
+Generates synthetic PDFs and measures the speed and memory use of PDFSplitter
+
+Usage:
+    python benchmark.py generate corpus.pdf --pages 500 --images 1 --fonts 2
+    python benchmark.py run --pages 500 --images 1 --output results.json
+    python benchmark.py run --pdf existing.pdf --compare results.json
+    python benchmark.py check
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import PyPDF2
+from PIL import Image
+from reportlab.lib.pagesizes import A4, A3, LETTER, LEGAL
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from pdf_splitter import PDFSplitter
+from pdf_images import ImageRecompressor
+
+
+PAGE_SIZES = {'letter': LETTER, 'legal': LEGAL, 'a4': A4, 'a3': A3}
+
+# TrueType fonts shipped with reportlab, embedded in the output when used
+EMBEDDED_FONTS = ['Vera', 'VeraBd', 'VeraIt', 'VeraBI']
+
+LOREM = ("Lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+         "tempor incididunt ut labore et dolore magna aliqua").split()
+
+METHODS = ['split_into_two', 'split_into_n_parts', 'split_by_ranges', 'extract_pages']
+
+
+def generate_pdf(output_path, pages=100, images=0, fonts=1, page_size='letter',
+                 image_px=600, seed=0):
+    """
+    Generate a synthetic PDF.
+    
+    Args:
+        output_path (str): Where to write the PDF
+        pages (int): Number of pages
+        images (int): Number of distinct random images embedded on each page
+        fonts (int): Number of embedded TrueType fonts used in the text (0-4).
+                     0 uses the non-embedded Helvetica base font.
+        page_size (str): One of PAGE_SIZES
+        image_px (int): Width and height of each generated image in pixels
+        seed (int): Random seed, so the same arguments give the same document
+    
+    Returns:
+        str: Path to the generated PDF
+    """
+    if fonts < 0 or fonts > len(EMBEDDED_FONTS):
+        raise ValueError(f"fonts must be between 0 and {len(EMBEDDED_FONTS)}")
+    if page_size not in PAGE_SIZES:
+        raise ValueError(f"page_size must be one of {sorted(PAGE_SIZES)}")
+    
+    rng = random.Random(seed)
+    font_names = EMBEDDED_FONTS[:fonts] or ['Helvetica']
+    for name in EMBEDDED_FONTS[:fonts]:
+        pdfmetrics.registerFont(TTFont(name, f'{name}.ttf'))
+    
+    width, height = PAGE_SIZES[page_size]
+    doc = canvas.Canvas(output_path, pagesize=(width, height))
+    
+    with tempfile.TemporaryDirectory() as image_dir:
+        for page_num in range(pages):
+            for image_num in range(images):
+                # reportlab caches images by file name, so give each one its own file
+                image_path = os.path.join(image_dir, f'p{page_num}_{image_num}.jpg')
+                noise = rng.randbytes(image_px * image_px * 3)
+                Image.frombytes('RGB', (image_px, image_px), noise).save(image_path, quality=85)
+                size = width / (images + 1)
+                doc.drawImage(image_path, 20 + image_num * size, 40, size - 10, size - 10)
+                os.remove(image_path)
+            
+            y = height - 60
+            while y > height / 2:
+                doc.setFont(rng.choice(font_names), 10)
+                doc.drawString(40, y, ' '.join(rng.choice(LOREM) for _ in range(12)))
+                y -= 14
+            doc.setFont(font_names[0], 14)
+            doc.drawString(40, height - 40, f"Synthetic page {page_num + 1} of {pages}")
+            doc.showPage()
+    
+    doc.save()
+    return output_path
+
+
+def with_indirect_resources(input_path, output_path):
+    """
+    Rewrite a PDF so every page's /Resources is an indirect object.
+    
+    reportlab writes resources inline, but many real PDFs share them
+    between pages through a reference, which code reading /Resources
+    must resolve.
+    
+    Args:
+        input_path (str): PDF to rewrite
+        output_path (str): Where to write the rewritten PDF
+    
+    Returns:
+        str: Path to the rewritten PDF
+    """
+    writer = PyPDF2.PdfWriter()
+    for page in PyPDF2.PdfReader(input_path).pages:
+        writer.add_page(page)
+    for page in writer.pages:
+        resources = page[PyPDF2.generic.NameObject('/Resources')].get_object()
+        page[PyPDF2.generic.NameObject('/Resources')] = writer._add_object(resources)
+    with open(output_path, 'wb') as f:
+        writer.write(f)
+    return output_path
+
+
+def run_checks():
+    """
+    Split generated PDFs through the code paths that have broken on real
+    inputs before, and report which ones fail.
+    
+    Returns:
+        bool: True if every check passed
+    """
+    with tempfile.TemporaryDirectory() as work_dir:
+        source = generate_pdf(os.path.join(work_dir, 'images.pdf'), pages=4, images=1, image_px=300)
+        indirect = with_indirect_resources(source, os.path.join(work_dir, 'indirect.pdf'))
+        
+        def indirect_resources_images():
+            splitter = PDFSplitter(indirect, quiet=True)
+            output = splitter.extract_pages([1, 2], os.path.join(work_dir, 'extracted.pdf'),
+                                            images=ImageRecompressor(target_dpi=72))
+            return splitter.bytes_saved[output] > 0
+        
+        def empty_ranges():
+            return PDFSplitter(source, quiet=True).split_by_ranges([], output_dir=work_dir) == []
+        
+        checks = [('image recompression with indirect /Resources', indirect_resources_images),
+                  ('split_by_ranges with no ranges', empty_ranges)]
+        failed = 0
+        for name, check in checks:
+            try:
+                ok = check()
+                detail = '' if ok else ' (unexpected result)'
+            except Exception as e:
+                ok, detail = False, f' ({type(e).__name__}: {e})'
+            failed += not ok
+            print(f"{'✓' if ok else '✗'} {name}{detail}")
+    return failed == 0
+
+
+def _call_method(splitter, method, output_dir):
+    """Run one public PDFSplitter method with parameters scaled to the document"""
+    total = splitter.total_pages
+    if method == 'split_into_two':
+        return splitter.split_into_two(output_dir=output_dir)
+    if method == 'split_into_n_parts':
+        return splitter.split_into_n_parts(min(10, total), output_dir=output_dir)
+    if method == 'split_by_ranges':
+        step = max(1, total // 10)
+        ranges = [(start, min(start + step - 1, total)) for start in range(1, total + 1, step)]
+        return splitter.split_by_ranges(ranges, output_dir=output_dir)
+    if method == 'extract_pages':
+        return splitter.extract_pages(list(range(1, total + 1, 2)),
+                                      output_file=os.path.join(output_dir, 'extracted.pdf'))
+    raise ValueError(f"Unknown method: {method}")
+
+
+def benchmark_method(pdf_path, method, repeat=3):
+    """
+    Time one method on a PDF.
+    
+    Each repetition opens a fresh PDFSplitter so parsing is included, and
+    writes into a temporary directory that is removed afterwards. Peak memory
+    is the peak of Python allocations (tracemalloc), which covers PyPDF2's
+    object graph and buffers.
+    
+    Returns:
+        dict: Best wall time, pages/sec and peak memory over the repetitions
+    """
+    timings = []
+    peaks = []
+    pages = 0
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as output_dir:
+            tracemalloc.start()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                splitter = PDFSplitter(pdf_path)
+                _call_method(splitter, method, output_dir)
+            timings.append(time.perf_counter() - start)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            pages = splitter.total_pages
+    
+    best = min(timings)
+    return {
+        'method': method,
+        'pages': pages,
+        'wall_seconds': round(best, 4),
+        'pages_per_second': round(pages / best, 1) if best else None,
+        'peak_memory_mb': round(max(peaks) / (1024 * 1024), 2),
+        'runs': [round(t, 4) for t in timings],
+    }
+
+
+def run_benchmarks(pdf_path, methods=METHODS, repeat=3, corpus=None):
+    """
+    Benchmark every requested method on a PDF.
+    
+    Returns:
+        dict: Environment info, corpus description and per-method results
+    """
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'pypdf2': PyPDF2.__version__,
+            'platform': platform.platform(),
+        },
+        'corpus': corpus or {'pdf': os.path.abspath(pdf_path)},
+        'file_size_bytes': os.path.getsize(pdf_path),
+        'results': [benchmark_method(pdf_path, method, repeat) for method in methods],
+    }
+
+
+def print_report(report, baseline=None):
+    """Print a results table, with the change against a baseline run if given"""
+    baseline_results = {}
+    if baseline:
+        baseline_results = {r['method']: r for r in baseline['results']}
+    
+    env = report['environment']
+    print(f"\n📊 PyPDF2 {env['pypdf2']}, Python {env['python']}, "
+          f"{report['file_size_bytes'] / (1024 * 1024):.1f} MB input")
+    print("-" * 78)
+    print(f"{'method':<20}{'pages':>7}{'wall (s)':>11}{'pages/s':>11}{'peak MB':>10}{'vs baseline':>19}")
+    for result in report['results']:
+        change = ''
+        old = baseline_results.get(result['method'])
+        if old and old['wall_seconds']:
+            delta = (result['wall_seconds'] - old['wall_seconds']) / old['wall_seconds'] * 100
+            change = f"{delta:+.1f}% time"
+        print(f"{result['method']:<20}{result['pages']:>7}{result['wall_seconds']:>11.3f}"
+              f"{result['pages_per_second']:>11.1f}{result['peak_memory_mb']:>10.1f}{change:>19}")
+    print("-" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDFSplitter benchmark suite")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    def add_corpus_args(sub):
+        sub.add_argument('--pages', type=int, default=200, help='number of pages (default: 200)')
+        sub.add_argument('--images', type=int, default=0, help='images per page (default: 0)')
+        sub.add_argument('--fonts', type=int, default=1,
+                         help=f'embedded fonts, 0-{len(EMBEDDED_FONTS)} (default: 1)')
+        sub.add_argument('--page-size', choices=sorted(PAGE_SIZES), default='letter')
+        sub.add_argument('--image-px', type=int, default=600, help='image width/height in pixels')
+        sub.add_argument('--seed', type=int, default=0)
+    
+    generate = commands.add_parser('generate', help='write a synthetic PDF')
+    generate.add_argument('output', help='path of the PDF to create')
+    add_corpus_args(generate)
+    
+    run = commands.add_parser('run', help='benchmark PDFSplitter')
+    run.add_argument('--pdf', help='benchmark an existing PDF instead of a generated one')
+    add_corpus_args(run)
+    run.add_argument('--methods', nargs='+', choices=METHODS, default=METHODS)
+    run.add_argument('--repeat', type=int, default=3, help='runs per method, best is kept')
+    run.add_argument('--output', help='save results as JSON')
+    run.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    
+    commands.add_parser('check', help='split generated PDFs through known edge cases')
+    
+    args = parser.parse_args()
+    if args.command == 'check':
+        return 0 if run_checks() else 1
+    
+    corpus = {
+        'pages': args.pages, 'images': args.images, 'fonts': args.fonts,
+        'page_size': args.page_size, 'image_px': args.image_px, 'seed': args.seed,
+    }
+    
+    if args.command == 'generate':
+        generate_pdf(args.output, **corpus)
+        print(f"✓ Generated {args.output} ({os.path.getsize(args.output) / 1024:.1f} KB)")
+        return
+    
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        if args.pdf:
+            pdf_path, corpus = args.pdf, None
+        else:
+            pdf_path = generate_pdf(os.path.join(corpus_dir, 'synthetic.pdf'), **corpus)
+        report = run_benchmarks(pdf_path, args.methods, args.repeat, corpus)
+    
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
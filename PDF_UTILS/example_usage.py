@@ -101,6 +101,7 @@ if __name__ == "__main__":
     print("\n🔧 PDF Splitter - Example Usage")
     print("="*60)
     print("Before running, please update 'pdf_path' with your actual PDF file.")
+    print("No PDF handy? Create one with: python benchmark.py generate sample.pdf --pages 20")
     print("="*60)
     
     # Run the examples
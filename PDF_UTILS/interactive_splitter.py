@@ -7,6 +7,7 @@ A user-friendly CLI tool for splitting PDFs with interactive prompts
 import os
 import sys
 from pdf_splitter import PDFSplitter
+from progress import ProgressBar
 
 
 def print_header():
@@ -59,6 +60,8 @@ def display_split_options():
     print("   3. Split into N equal parts")
     print("   4. Split by custom page ranges")
     print("   5. Extract specific pages")
+    print("   6. Split by maximum file size")
+    print("   7. Extract pages containing text")
     print("   0. Exit")
     print_separator()
 
@@ -87,6 +90,29 @@ def get_output_directory():
     return None
 
 
+def get_worker_count():
+    """Get the number of worker processes from user"""
+    cpu_count = os.cpu_count() or 1
+    print(f"\n⚙️  Worker processes (1-{cpu_count}, press Enter for 1):")
+    
+    while True:
+        workers = input("   → ").strip()
+        if not workers:
+            return 1
+        
+        try:
+            workers = int(workers)
+        except ValueError:
+            print("   ❌ Please enter a valid number!")
+            continue
+        
+        if workers < 1:
+            print("   ❌ Number of workers must be at least 1")
+            continue
+        
+        return workers
+
+
 def split_into_two_middle(splitter):
     """Split PDF into two parts at the middle"""
     print(f"\n✂️  Splitting into two parts at the middle (page {splitter.total_pages // 2})...")
@@ -155,8 +181,10 @@ def split_into_n_parts(splitter):
     if output_dir is False:
         return
     
+    workers = get_worker_count()
+    
     try:
-        parts = splitter.split_into_n_parts(n_parts=n_parts, output_dir=output_dir)
+        parts = splitter.split_into_n_parts(n_parts=n_parts, output_dir=output_dir, workers=workers)
         print(f"\n✅ Success! Created {len(parts)} files")
     except Exception as e:
         print(f"\n❌ Error: {str(e)}")
@@ -216,8 +244,10 @@ def split_by_ranges(splitter):
     if output_dir is False:
         return
     
+    workers = get_worker_count()
+    
     try:
-        parts = splitter.split_by_ranges(page_ranges=ranges, output_dir=output_dir)
+        parts = splitter.split_by_ranges(page_ranges=ranges, output_dir=output_dir, workers=workers)
         print(f"\n✅ Success! Created {len(parts)} files")
     except Exception as e:
         print(f"\n❌ Error: {str(e)}")
@@ -256,6 +286,66 @@ def extract_specific_pages(splitter):
         print(f"\n❌ Error: {str(e)}")
 
 
+def split_by_max_size(splitter):
+    """Split PDF into parts no larger than a given size"""
+    file_size_mb = os.path.getsize(splitter.pdf_path) / (1024 * 1024)
+    print(f"\n📦 PDF size: {file_size_mb:.1f} MB, {splitter.total_pages} pages")
+    
+    while True:
+        try:
+            max_mb = input("   Maximum size per part in MB (e.g. 10 or 2.5): ").strip()
+            max_mb = float(max_mb)
+            
+            if max_mb <= 0:
+                print("   ❌ Size must be greater than 0")
+                continue
+            
+            break
+        except ValueError:
+            print("   ❌ Please enter a valid number!")
+    
+    output_dir = get_output_directory()
+    if output_dir is False:
+        return
+    
+    try:
+        parts = splitter.split_by_max_bytes(max_bytes=int(max_mb * 1024 * 1024), output_dir=output_dir)
+        print(f"\n✅ Success! Created {len(parts)} files")
+    except Exception as e:
+        print(f"\n❌ Error: {str(e)}")
+
+
+def extract_matching_pages(splitter):
+    """Extract the pages that contain some text, e.g. an invoice number"""
+    print("\n🔎 Enter the text to look for (e.g. an invoice number):")
+    query = input("   → ").strip()
+    if not query:
+        print("   ❌ Please enter some text!")
+        return
+    
+    try:
+        pages = splitter.find_pages(query)
+    except Exception as e:
+        print(f"\n❌ Error: {str(e)}")
+        return
+    
+    if not pages:
+        print(f"   ⚠️  No pages contain '{query}'")
+        return
+    
+    print(f"\n✂️  Will extract {len(pages)} pages: {pages}")
+    
+    output_file = input("\n   Output filename (press Enter for default): ").strip()
+    if not output_file:
+        output_file = None
+    
+    try:
+        splitter.extract_pages(pages=pages, output_file=output_file)
+        print(f"\n✅ Success!")
+    except Exception as e:
+        print(f"\n❌ Error: {str(e)}")
+
+
 def main():
     """Main interactive loop"""
     print_header()
@@ -268,7 +358,7 @@ def main():
     
     # Initialize splitter
     try:
-        splitter = PDFSplitter(pdf_path)
+        splitter = PDFSplitter(pdf_path, progress=ProgressBar(), quiet=True)
         print(f"\n✅ PDF loaded successfully!")
         print(f"   📄 File: {os.path.basename(pdf_path)}")
         print(f"   📖 Total pages: {splitter.total_pages}")
@@ -295,8 +385,12 @@ def main():
             split_by_ranges(splitter)
         elif choice == '5':
             extract_specific_pages(splitter)
+        elif choice == '6':
+            split_by_max_size(splitter)
+        elif choice == '7':
+            extract_matching_pages(splitter)
         else:
-            print("   ❌ Invalid choice! Please enter 0-5")
+            print("   ❌ Invalid choice! Please enter 0-7")
         
         if choice != '0':
             print("\n" + "="*70)
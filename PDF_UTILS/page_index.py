@@ -0,0 +1,200 @@
+"""
+Page Index Module
+An on-disk full-text index of PDF page text, keyed by the content hash of each document
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from PyPDF2 import PdfReader
+from typing import Optional, List
+
+
+# Where PDFSplitter keeps its index unless given another one
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".pdf_utils", "page_index.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_hash TEXT PRIMARY KEY,
+    page_count INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    text,
+    doc_hash UNINDEXED,
+    page UNINDEXED
+);
+"""
+
+
+def content_hash(pdf_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Get the SHA-256 of a file's bytes, read in chunks.
+    
+    Args:
+        pdf_path (str): Path to the file
+        chunk_size (int): Bytes read at a time
+    
+    Returns:
+        str: Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PageIndex:
+    """
+    A SQLite FTS5 index of the text on every page of the PDFs it has seen.
+    
+    Documents are keyed by the hash of their content, not their path, so a
+    renamed or copied file is found in the index and a file that changed in
+    place is indexed again. Text is extracted once per document; later
+    searches, including regular-expression matches, are answered from the
+    stored text without opening the PDF.
+    
+    Attributes:
+        db_path (str): Path to the SQLite database file
+    
+    Example:
+        with PageIndex("pages.db") as index:
+            doc = index.ensure_indexed("invoices.pdf")
+            pages = index.search(doc, "INV-0042")
+    """
+    
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Open (or create) a page index.
+        
+        Args:
+            db_path (str, optional): Path to the database file. Defaults to
+                                     DEFAULT_INDEX_PATH. Use ":memory:" for a
+                                     throwaway index.
+        """
+        self.db_path = db_path or DEFAULT_INDEX_PATH
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.executescript(_SCHEMA)
+    
+    def close(self) -> None:
+        """Close the database connection"""
+        self._conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def is_indexed(self, doc_hash: str) -> bool:
+        """
+        Check whether a document's pages are already in the index.
+        
+        Args:
+            doc_hash (str): Content hash from content_hash()
+        
+        Returns:
+            bool: True if the document has been indexed
+        """
+        row = self._conn.execute("SELECT 1 FROM documents WHERE doc_hash = ?", (doc_hash,)).fetchone()
+        return row is not None
+    
+    def ensure_indexed(self, pdf_path: str, reader: Optional[PdfReader] = None,
+                       doc_hash: Optional[str] = None) -> str:
+        """
+        Index a PDF's page text unless a PDF with the same content already is.
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+            reader (PdfReader, optional): An open reader for the file, used
+                                          instead of parsing it again
+            doc_hash (str, optional): The file's content hash, if already known
+        
+        Returns:
+            str: The document's content hash, for search() and match()
+        """
+        if doc_hash is None:
+            doc_hash = content_hash(pdf_path)
+        if self.is_indexed(doc_hash):
+            return doc_hash
+        
+        if reader is None:
+            reader = PdfReader(pdf_path)
+        
+        rows = []
+        for page_num, page in enumerate(reader.pages, start=1):
+            try:
+                text = page.extract_text() or ""
+            except Exception:
+                # A page PyPDF2 can't read is indexed as blank rather than failing the document
+                text = ""
+            rows.append((text, doc_hash, page_num))
+        
+        with self._conn:
+            self._conn.executemany("INSERT INTO pages (text, doc_hash, page) VALUES (?, ?, ?)", rows)
+            self._conn.execute("INSERT INTO documents (doc_hash, page_count, indexed_at) VALUES (?, ?, ?)",
+                               (doc_hash, len(rows), time.time()))
+        return doc_hash
+    
+    def search(self, doc_hash: str, query: str, fts_syntax: bool = False) -> List[int]:
+        """
+        Find the pages of a document whose text matches a full-text query.
+        
+        Args:
+            doc_hash (str): Content hash from ensure_indexed()
+            query (str): Text to look for. By default it is matched as a
+                         phrase, case-insensitively and ignoring punctuation,
+                         so "INV-0042" finds "inv 0042" too.
+            fts_syntax (bool): Pass query to SQLite FTS5 as-is, allowing
+                               AND/OR/NOT, prefix* and NEAR() queries
+        
+        Returns:
+            List[int]: Matching page numbers (1-based), in page order
+        """
+        if not fts_syntax:
+            query = '"' + query.replace('"', '""') + '"'
+        
+        rows = self._conn.execute(
+            "SELECT page FROM pages WHERE pages MATCH ? AND doc_hash = ? ORDER BY page",
+            (query, doc_hash)).fetchall()
+        return [int(page) for page, in rows]
+    
+    def match(self, doc_hash: str, pattern: str, flags: int = 0) -> List[int]:
+        """
+        Find the pages of a document whose text matches a regular expression.
+        
+        Runs over the stored page text, so the PDF isn't opened.
+        
+        Args:
+            doc_hash (str): Content hash from ensure_indexed()
+            pattern (str): Regular expression, searched anywhere in the page text
+            flags (int): re module flags, e.g. re.IGNORECASE
+        
+        Returns:
+            List[int]: Matching page numbers (1-based), in page order
+        """
+        regex = re.compile(pattern, flags)
+        rows = self._conn.execute(
+            "SELECT page, text FROM pages WHERE doc_hash = ? ORDER BY page", (doc_hash,))
+        return [int(page) for page, text in rows if regex.search(text)]
+    
+    def page_text(self, doc_hash: str, page: int) -> Optional[str]:
+        """
+        Get the stored text of one page.
+        
+        Args:
+            doc_hash (str): Content hash from ensure_indexed()
+            page (int): Page number (1-based)
+        
+        Returns:
+            str: The page text, or None if the page isn't indexed
+        """
+        row = self._conn.execute("SELECT text FROM pages WHERE doc_hash = ? AND page = ?",
+                                 (doc_hash, page)).fetchone()
+        return row[0] if row else None
@@ -0,0 +1,266 @@
+"""
+PDF Images Module
+Downsamples and recompresses the images embedded in a PdfWriter, in parallel
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Optional, List, Tuple, Dict
+from PIL import Image
+from PyPDF2 import PdfWriter
+from PyPDF2.filters import decode_stream_data
+from PyPDF2.generic import (ArrayObject, ContentStream, DictionaryObject, IndirectObject, NameObject,
+                            NumberObject, StreamObject)
+
+
+# Keys of the original image dictionary carried over to the recompressed one
+_KEPT_KEYS = ('/SMask', '/Interpolate', '/Intent', '/OC', '/Metadata', '/StructParent')
+
+# Color spaces whose samples Pillow reads the way the PDF means them
+_MODES = {'/DeviceRGB': 'RGB', '/DeviceGray': 'L'}
+
+
+def _multiply(m, n):
+    """Multiply two PDF transformation matrices [a b c d e f]"""
+    return [m[0] * n[0] + m[1] * n[2], m[0] * n[1] + m[1] * n[3],
+            m[2] * n[0] + m[3] * n[2], m[2] * n[1] + m[3] * n[3],
+            m[4] * n[0] + m[5] * n[2] + n[4], m[4] * n[1] + m[5] * n[3] + n[5]]
+
+
+def _image_mode(image: StreamObject) -> Optional[str]:
+    """Get the Pillow mode for an image's color space, or None if it isn't supported"""
+    color_space = image.get('/ColorSpace')
+    if isinstance(color_space, IndirectObject):
+        color_space = color_space.get_object()
+    if isinstance(color_space, list) and color_space and color_space[0] == '/ICCBased':
+        components = color_space[1].get_object().get('/N')
+        return {1: 'L', 3: 'RGB'}.get(components)
+    return _MODES.get(color_space)
+
+
+def _filters(image: StreamObject) -> List[str]:
+    filters = image.get('/Filter', [])
+    return [filters] if isinstance(filters, str) else list(filters)
+
+
+def _resolved(obj):
+    """Copy a filter parameter value with indirect references replaced by their objects"""
+    obj = obj.get_object() if isinstance(obj, IndirectObject) else obj
+    if isinstance(obj, DictionaryObject):
+        return DictionaryObject({key: _resolved(value) for key, value in obj.items()})
+    if isinstance(obj, ArrayObject):
+        return ArrayObject(_resolved(value) for value in obj)
+    return obj
+
+
+def _is_recompressible(image: StreamObject) -> bool:
+    """Check whether an image can be turned into a JPEG without changing how it looks"""
+    if image.get('/ImageMask') or '/Mask' in image or '/Decode' in image:
+        return False
+    if image.get('/BitsPerComponent') != 8 or _image_mode(image) is None:
+        return False
+    # JPEGs are re-read by Pillow; lossless encodings (Flate, LZW, ...) decode
+    # to raw samples, but JPEG 2000, JBIG2 and CCITT images don't
+    filters = _filters(image)
+    if filters[-1:] == ['/DCTDecode']:
+        return True
+    return not any(f in ('/JPXDecode', '/JBIG2Decode', '/CCITTFaxDecode') for f in filters)
+
+
+def displayed_sizes(writer: PdfWriter) -> Dict[int, Tuple[float, float]]:
+    """
+    Find the largest size, in points, at which each image is drawn.
+    
+    Follows the current transformation matrix through every page's content
+    stream (and through form XObjects) up to each Do operator.
+    
+    Args:
+        writer (PdfWriter): Writer whose pages have all been added
+    
+    Returns:
+        Dict[int, Tuple[float, float]]: (width, height) in points by image object number
+    """
+    sizes = {}
+    
+    def resolved(obj, key, default=None):
+        # dict.get doesn't resolve indirect references, and /Resources,
+        # /XObject and /Matrix are often stored as separate objects
+        return obj[key].get_object() if obj is not None and key in obj else default
+    
+    def walk(contents, resources, ctm, seen_forms):
+        xobjects = resolved(resources, '/XObject', DictionaryObject())
+        stack = []
+        for operands, operator in ContentStream(contents, writer).operations:
+            if operator == b'q':
+                stack.append(ctm)
+            elif operator == b'Q' and stack:
+                ctm = stack.pop()
+            elif operator == b'cm':
+                ctm = _multiply([float(x) for x in operands], ctm)
+            elif operator == b'Do' and operands[0] in xobjects:
+                ref = xobjects.raw_get(operands[0])
+                xobject = ref.get_object()
+                if not isinstance(ref, IndirectObject):
+                    continue
+                if xobject.get('/Subtype') == '/Image':
+                    width = math.hypot(ctm[0], ctm[1])
+                    height = math.hypot(ctm[2], ctm[3])
+                    old = sizes.get(ref.idnum, (0.0, 0.0))
+                    sizes[ref.idnum] = (max(old[0], width), max(old[1], height))
+                elif xobject.get('/Subtype') == '/Form' and ref.idnum not in seen_forms:
+                    matrix = [float(x) for x in resolved(xobject, '/Matrix', [1, 0, 0, 1, 0, 0])]
+                    walk(xobject, resolved(xobject, '/Resources'), _multiply(matrix, ctm),
+                         seen_forms | {ref.idnum})
+    
+    for page in writer.pages:
+        contents = page.get_contents()
+        if contents is not None:
+            walk(contents, resolved(page, '/Resources'), [1, 0, 0, 1, 0, 0], frozenset())
+    
+    return sizes
+
+
+def _recompress(encoded: bytes, filters: List[str], decode_parms, is_jpeg: bool, mode: str,
+                width: int, height: int, target: Tuple[int, int],
+                quality: int) -> Tuple[bytes, int, int]:
+    """
+    Decode, resize and JPEG-encode one image. Runs in a worker process.
+    
+    Returns:
+        Tuple[bytes, int, int]: JPEG bytes, width and height
+    """
+    # Undo the PDF filters here rather than in the parent; ASCII85 and Flate
+    # decoding of large scans is a good part of the work
+    stream = StreamObject()
+    stream._data = encoded
+    stream[NameObject('/Filter')] = ArrayObject(NameObject(f) for f in filters)
+    if decode_parms is not None:
+        stream[NameObject('/DecodeParms')] = decode_parms
+    data = decode_stream_data(stream)
+    
+    if is_jpeg:
+        image = Image.open(BytesIO(data))
+        image.draft(mode, target)  # let the JPEG decoder downscale for free
+        image = image.convert(mode)
+    else:
+        image = Image.frombytes(mode, (width, height), data)
+    
+    if image.width > target[0] or image.height > target[1]:
+        image = image.resize(target, Image.LANCZOS)
+    
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=quality, optimize=True)
+    return buffer.getvalue(), image.width, image.height
+
+
+class ImageRecompressor:
+    """
+    Downsample and recompress the images in a PdfWriter.
+    
+    Each image is resized so that it has at most target_dpi pixels per inch
+    at the largest size it is drawn on any page, then re-encoded as a JPEG
+    at the given quality (Pillow, optimize=True). Pages, content streams and
+    soft masks are left alone, so the page structure is unchanged. Images
+    that would not get smaller, and kinds that can't be turned into JPEGs
+    faithfully (masks, CMYK, indexed colors, JBIG2, JPEG 2000), are kept as
+    they are. Images are processed on a pool of worker processes.
+    
+    Attributes:
+        target_dpi (int): Resolution images are downsampled to
+        quality (int): JPEG quality, 1-95
+        workers (int): Worker processes for decoding and encoding images
+    
+    Example:
+        images = ImageRecompressor(target_dpi=150, quality=70, workers=4)
+        splitter.split_into_n_parts(4, images=images)
+    """
+    
+    def __init__(self, target_dpi: int = 150, quality: int = 75, workers: int = 1):
+        """
+        Args:
+            target_dpi (int): Maximum pixels per inch of any image as drawn
+            quality (int): JPEG quality, 1-95
+            workers (int): Worker processes used to recompress images. 1 works
+                           in the calling process.
+        """
+        if target_dpi < 1:
+            raise ValueError("target_dpi must be at least 1")
+        if not 1 <= quality <= 95:
+            raise ValueError("quality must be between 1 and 95")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        
+        self.target_dpi = target_dpi
+        self.quality = quality
+        self.workers = workers
+    
+    def with_workers(self, workers: int) -> 'ImageRecompressor':
+        """Get a copy of these settings using a different number of workers"""
+        return ImageRecompressor(self.target_dpi, self.quality, workers)
+    
+    def apply(self, writer: PdfWriter) -> Dict[str, int]:
+        """
+        Recompress the images in a writer, in place.
+        
+        Args:
+            writer (PdfWriter): Writer whose pages have all been added
+        
+        Returns:
+            Dict[str, int]: images_recompressed, bytes_before and bytes_after
+                            (encoded size of the recompressed images)
+        """
+        jobs = []
+        for idnum, (width_pt, height_pt) in displayed_sizes(writer).items():
+            image = writer._objects[idnum - 1]
+            if not isinstance(image, StreamObject) or not _is_recompressible(image):
+                continue
+            
+            width, height = int(image['/Width']), int(image['/Height'])
+            target = (min(width, max(1, math.ceil(width_pt / 72 * self.target_dpi))),
+                      min(height, max(1, math.ceil(height_pt / 72 * self.target_dpi))))
+            is_jpeg = _filters(image)[-1:] == ['/DCTDecode']
+            if target == (width, height) and is_jpeg:
+                continue  # already small enough and already a JPEG
+            
+            decode_parms = image.get('/DecodeParms')
+            if decode_parms is not None:
+                decode_parms = _resolved(decode_parms)
+            jobs.append((idnum, (image._data, _filters(image), decode_parms, is_jpeg,
+                                 _image_mode(image), width, height, target, self.quality)))
+        
+        if self.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+                results = list(pool.map(_recompress, *zip(*(args for _, args in jobs))))
+        else:
+            results = [_recompress(*args) for _, args in jobs]
+        
+        stats = {'images_recompressed': 0, 'bytes_before': 0, 'bytes_after': 0}
+        for (idnum, _), result in zip(jobs, results):
+            original = writer._objects[idnum - 1]
+            data, width, height = result
+            if len(data) >= len(original._data):
+                continue
+            
+            image = StreamObject()
+            image._data = data
+            image.update({
+                NameObject('/Type'): NameObject('/XObject'),
+                NameObject('/Subtype'): NameObject('/Image'),
+                NameObject('/Width'): NumberObject(width),
+                NameObject('/Height'): NumberObject(height),
+                NameObject('/ColorSpace'): original['/ColorSpace'],
+                NameObject('/BitsPerComponent'): NumberObject(8),
+                NameObject('/Filter'): NameObject('/DCTDecode'),
+            })
+            for key in _KEPT_KEYS:
+                if key in original:
+                    image[NameObject(key)] = original.raw_get(key)
+            image.indirect_reference = IndirectObject(idnum, 0, writer)
+            writer._objects[idnum - 1] = image
+            
+            stats['images_recompressed'] += 1
+            stats['bytes_before'] += len(original._data)
+            stats['bytes_after'] += len(data)
+        
+        return stats
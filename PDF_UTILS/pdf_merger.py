@@ -0,0 +1,346 @@
+"""
+PDF Merger Module
+A utility class for merging many PDF files into one, streaming the output to disk
+"""
+
+import hashlib
+import os
+from array import array
+from collections import ChainMap, OrderedDict
+from io import BytesIO
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (ArrayObject, DictionaryObject, IndirectObject, NameObject,
+                            NullObject, StreamObject)
+from typing import Optional, List, Tuple, Dict, Iterable, Union, Callable, MutableMapping
+
+try:
+    from .progress import ProgressEvent
+except ImportError:
+    from progress import ProgressEvent
+
+
+# Object numbers reserved for the output's catalog and page tree root
+_CATALOG_NUM = 1
+_PAGES_NUM = 2
+
+# Objects that belong to one placement of a page and are never shared
+_PER_PAGE_TYPES = ('/Page', '/Annot')
+
+# Document-level objects of an input that must not be copied into the output
+_SKIPPED_TYPES = ('/Pages', '/Catalog')
+
+
+class _CachedInput:
+    """An open input PDF together with the output numbers of objects already copied from it"""
+    
+    def __init__(self, pdf_path: str):
+        self.handle = open(pdf_path, 'rb')
+        try:
+            self.reader = PdfReader(self.handle)
+        except Exception:
+            self.handle.close()
+            raise
+        self.copied: Dict[int, int] = {}
+    
+    def close(self) -> None:
+        self.handle.close()
+
+
+class PDFMerger:
+    """
+    A class to merge many PDF files into one without holding them all in memory.
+    
+    Inputs are read one at a time, in order, and every object is written to
+    the output file as soon as it has been copied, so memory use does not grow
+    with the size of the output. Open inputs are kept in a small LRU cache
+    (max_open), which bounds the number of open file handles and parsed
+    readers while still letting a file that appears several times in the
+    input list be parsed only once. Identical fonts, images and other shared
+    resources are written once and referenced by every page that uses them.
+    
+    Attributes:
+        max_open (int): Maximum number of input files open at the same time
+        deduplicate (bool): Whether byte-identical objects are written only once
+        inputs (List[Tuple[str, Optional[List[int]]]]): Inputs added with append()
+        objects_reused (int): Objects skipped as duplicates by the last merge
+    
+    Example:
+        merger = PDFMerger(max_open=8)
+        merger.append("cover.pdf")
+        merger.append("scan.pdf", pages=[1, 3])
+        merger.write("bundle.pdf")
+    """
+    
+    def __init__(self, max_open: int = 16, deduplicate: bool = True,
+                 progress: Optional[Callable[[ProgressEvent], None]] = None,
+                 quiet: bool = False):
+        """
+        Initialize the PDFMerger.
+        
+        Args:
+            max_open (int): Maximum number of input files (and parsed readers)
+                            kept open at once. Must be at least 1.
+            deduplicate (bool): Write byte-identical objects, such as a logo
+                                image or font embedded in every input, only once
+            progress (Callable[[ProgressEvent], None], optional): Called with a
+                            ProgressEvent at the start and end of the merge and
+                            after each input. part_index is the input's index.
+            quiet (bool): If True, nothing is printed
+        """
+        if max_open < 1:
+            raise ValueError("max_open must be at least 1")
+        
+        self.max_open = max_open
+        self.deduplicate = deduplicate
+        self.progress = progress
+        self.quiet = quiet
+        self.inputs: List[Tuple[str, Optional[List[int]]]] = []
+        self.objects_reused = 0
+    
+    def append(self, pdf_path: str, pages: Optional[List[int]] = None) -> 'PDFMerger':
+        """
+        Queue a PDF (or some of its pages) to be merged.
+        
+        Nothing is opened until write() is called.
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+            pages (List[int], optional): Page numbers to take, 1-based and in
+                                         output order. If None, takes all pages.
+        
+        Returns:
+            PDFMerger: This merger, so calls can be chained
+        """
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        
+        self.inputs.append((pdf_path, list(pages) if pages is not None else None))
+        return self
+    
+    def write(self, output_file: str) -> str:
+        """
+        Merge the queued inputs into one PDF.
+        
+        Args:
+            output_file (str): Path of the merged PDF
+        
+        Returns:
+            str: Path to the output PDF file
+        """
+        return self.merge(self.inputs, output_file)
+    
+    def merge(self, inputs: Iterable[Union[str, Tuple[str, Optional[List[int]]]]],
+              output_file: str) -> str:
+        """
+        Merge PDFs into one file, streaming both the inputs and the output.
+        
+        inputs may be any iterable, including a generator, so a list of
+        10,000 paths never has to be built in memory.
+        
+        Args:
+            inputs (Iterable): PDF paths, or (path, pages) tuples where pages is
+                               a list of 1-based page numbers or None for all pages
+            output_file (str): Path of the merged PDF
+        
+        Returns:
+            str: Path to the output PDF file
+        
+        Raises:
+            FileNotFoundError: If an input file doesn't exist
+            ValueError: If a page number is out of range or there are no pages
+        """
+        cache: 'OrderedDict[str, _CachedInput]' = OrderedDict()
+        self._offsets = array('q', [0, 0, 0])  # index 0 is the free-list head
+        self._hashes: Dict[bytes, int] = {}
+        self._page_nums = array('q')
+        self.objects_reused = 0
+        input_count = 0
+        
+        self._emit('start')
+        try:
+            with open(output_file, 'wb') as out:
+                self._out = out
+                out.write(b"%PDF-1.7\n%\xE2\xE3\xCF\xD3\n")
+                
+                for input_index, item in enumerate(inputs):
+                    pdf_path, pages = (item, None) if isinstance(item, str) else item
+                    source = self._open_input(cache, pdf_path)
+                    copied = self._copy_pages(source, pdf_path, pages)
+                    input_count += 1
+                    self._emit('part_end', part_index=input_index, output_file=pdf_path,
+                               pages_copied=copied, pages_total=copied)
+                
+                if not self._page_nums:
+                    raise ValueError("No pages to merge")
+                
+                self._write_document_root()
+        finally:
+            self._out = None
+            for source in cache.values():
+                source.close()
+        
+        self._emit('finish', part_count=input_count, pages_copied=len(self._page_nums),
+                   pages_total=len(self._page_nums), bytes_written=os.path.getsize(output_file))
+        if not self.quiet:
+            print(f"✓ Merged {input_count} files ({len(self._page_nums)} pages) into: {output_file}")
+            if self.deduplicate and self.objects_reused:
+                print(f"  Reused {self.objects_reused} duplicate objects")
+        return output_file
+    
+    def _emit(self, kind: str, **fields) -> None:
+        if self.progress is not None:
+            self.progress(ProgressEvent(kind, 'merge', **fields))
+    
+    def _open_input(self, cache: 'OrderedDict[str, _CachedInput]', pdf_path: str) -> _CachedInput:
+        """Return the cached reader for a path, opening it and evicting the oldest if needed"""
+        key = os.path.abspath(pdf_path)
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        
+        while len(cache) >= self.max_open:
+            _, evicted = cache.popitem(last=False)
+            evicted.close()
+        
+        try:
+            cache[key] = _CachedInput(pdf_path)
+        except Exception as e:
+            raise Exception(f"Error reading PDF file {pdf_path}: {str(e)}")
+        return cache[key]
+    
+    def _copy_pages(self, source: _CachedInput, pdf_path: str,
+                    pages: Optional[List[int]]) -> int:
+        """Copy the selected pages of one input to the output and return how many were copied"""
+        reader_pages = source.reader.pages
+        if pages is None:
+            indices = list(range(len(reader_pages)))
+        else:
+            for page in pages:
+                if page < 1 or page > len(reader_pages):
+                    raise ValueError(f"Invalid page number {page} for {pdf_path}")
+            indices = [page - 1 for page in pages]
+        
+        # Number the pages first so links and annotations between them resolve.
+        # A page listed more than once gets a number per occurrence; links to
+        # it from other pages go to its first occurrence
+        page_nums = [self._allocate() for _ in indices]
+        first_placement = {}
+        for i, num in zip(indices, page_nums):
+            first_placement.setdefault(reader_pages[i].indirect_reference.idnum, num)
+        
+        for i, num in zip(indices, page_nums):
+            page = reader_pages[i]
+            # Per-page objects are recorded in this occurrence's own layer, so
+            # every occurrence gets its own copy of its annotations
+            placement = ChainMap({page.indirect_reference.idnum: num}, first_placement)
+            fields = DictionaryObject({key: value for key, value in page.items() if key != '/Parent'})
+            new_page = self._rewrite(fields, source, placement, set())
+            new_page[NameObject('/Parent')] = IndirectObject(_PAGES_NUM, 0, None)
+            self._write_object(num, self._serialize(new_page))
+            self._page_nums.append(num)
+            
+            # Everything this page needed is on disk now; let the reader forget it
+            source.reader.resolved_objects.clear()
+        
+        return len(indices)
+    
+    def _copy_object(self, ref: IndirectObject, source: _CachedInput,
+                     placement: MutableMapping[int, int], in_progress: set):
+        """Copy a referenced object to the output and return a reference to its new number"""
+        idnum = ref.idnum
+        if idnum in placement:
+            return IndirectObject(placement[idnum], 0, None)
+        if idnum in source.copied:
+            return IndirectObject(source.copied[idnum], 0, None)
+        
+        obj = ref.get_object()
+        obj_type = obj.get('/Type') if isinstance(obj, DictionaryObject) else None
+        if obj_type in _SKIPPED_TYPES or obj_type == '/Page':
+            # Document structure, or a page that isn't part of this merge
+            return NullObject()
+        
+        per_page = obj_type in _PER_PAGE_TYPES
+        if idnum in in_progress:
+            # Reference cycle: give the object its number now, it is written when the cycle unwinds
+            num = self._allocate()
+            (placement if per_page else source.copied)[idnum] = num
+            return IndirectObject(num, 0, None)
+        
+        in_progress.add(idnum)
+        data = self._serialize(self._rewrite(obj, source, placement, in_progress))
+        in_progress.discard(idnum)
+        
+        forward = placement.get(idnum) if per_page else source.copied.get(idnum)
+        if forward is not None:
+            self._write_object(forward, data)
+            return IndirectObject(forward, 0, None)
+        
+        if self.deduplicate and not per_page:
+            digest = hashlib.sha1(data).digest()
+            if digest in self._hashes:
+                self.objects_reused += 1
+                source.copied[idnum] = self._hashes[digest]
+                return IndirectObject(self._hashes[digest], 0, None)
+        
+        num = self._allocate()
+        self._write_object(num, data)
+        (placement if per_page else source.copied)[idnum] = num
+        if self.deduplicate and not per_page:
+            self._hashes[digest] = num
+        return IndirectObject(num, 0, None)
+    
+    def _rewrite(self, obj, source: _CachedInput, placement: MutableMapping[int, int], in_progress: set):
+        """Return a copy of obj whose indirect references point at output object numbers"""
+        if isinstance(obj, IndirectObject):
+            return self._copy_object(obj, source, placement, in_progress)
+        
+        if isinstance(obj, StreamObject):
+            copy = obj.__class__()
+            copy._data = obj._data
+            for key, value in obj.items():
+                if key != '/Length':
+                    copy[key] = self._rewrite(value, source, placement, in_progress)
+            return copy
+        
+        if isinstance(obj, DictionaryObject):
+            return DictionaryObject({key: self._rewrite(value, source, placement, in_progress)
+                                     for key, value in obj.items()})
+        
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._rewrite(value, source, placement, in_progress) for value in obj)
+        
+        return obj
+    
+    def _allocate(self) -> int:
+        self._offsets.append(0)
+        return len(self._offsets) - 1
+    
+    @staticmethod
+    def _serialize(obj) -> bytes:
+        buffer = BytesIO()
+        obj.write_to_stream(buffer, None)
+        return buffer.getvalue()
+    
+    def _write_object(self, num: int, data: bytes) -> None:
+        self._offsets[num] = self._out.tell()
+        self._out.write(f"{num} 0 obj\n".encode())
+        self._out.write(data)
+        self._out.write(b"\nendobj\n")
+    
+    def _write_document_root(self) -> None:
+        """Write the page tree, catalog, cross-reference table and trailer"""
+        kids = b" ".join(f"{num} 0 R".encode() for num in self._page_nums)
+        self._write_object(_PAGES_NUM, b"<< /Type /Pages /Kids [ " + kids +
+                           f" ] /Count {len(self._page_nums)} >>".encode())
+        self._write_object(_CATALOG_NUM, f"<< /Type /Catalog /Pages {_PAGES_NUM} 0 R >>".encode())
+        
+        xref_offset = self._out.tell()
+        self._out.write(f"xref\n0 {len(self._offsets)}\n".encode())
+        self._out.write(b"0000000000 65535 f \n")
+        for offset in self._offsets[1:]:
+            self._out.write(f"{offset:010d} 00000 n \n".encode())
+        self._out.write(f"trailer\n<< /Size {len(self._offsets)} /Root {_CATALOG_NUM} 0 R >>\n"
+                        f"startxref\n{xref_offset}\n%%EOF\n".encode())
@@ -0,0 +1,231 @@
+"""
+PDF Optimizer Module
+Shrinks PdfWriter output by compressing streams and removing duplicate objects
+"""
+
+from io import BytesIO
+from typing import Dict, Optional
+from PyPDF2 import PdfWriter
+from PyPDF2.generic import (ArrayObject, DictionaryObject, IndirectObject,
+                            NameObject, StreamObject)
+
+
+# Objects that must stay distinct even when their bytes match. An annotation
+# belongs to exactly one page, like in pdf_merger's _PER_PAGE_TYPES
+_STRUCTURAL_TYPES = ('/Page', '/Pages', '/Catalog', '/Annot')
+
+
+class _CountingSink:
+    """A write-only stream that counts bytes instead of storing them"""
+    
+    def __init__(self):
+        self.size = 0
+    
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self.size
+
+
+def measure_size(writer: PdfWriter) -> int:
+    """
+    Get the size in bytes the writer would produce, without keeping the output.
+    
+    Args:
+        writer (PdfWriter): Writer to measure
+    
+    Returns:
+        int: Size of the serialized PDF in bytes
+    """
+    sink = _CountingSink()
+    writer.write(sink)
+    return sink.size
+
+
+def optimize_writer(writer: PdfWriter) -> None:
+    """
+    Optimize a writer in place before it is written.
+    
+    Joins and compresses each page's content streams, Flate-encodes any other
+    stream stored without a filter, merges byte-identical objects such as
+    fonts and images copied in more than once, then drops the objects that
+    are no longer referenced and renumbers the rest.
+    
+    Works on PdfWriter internals (_objects, _root, _info, _pages), since
+    PyPDF2 has no public API for removing objects from a writer.
+    
+    Args:
+        writer (PdfWriter): Writer whose pages have all been added
+    """
+    for page in writer.pages:
+        page.compress_content_streams()
+    
+    # compress_content_streams leaves the new stream inline in the page;
+    # register it so it can be deduplicated like every other object
+    for page in writer.pages:
+        contents = page.get(NameObject('/Contents'))
+        if isinstance(contents, StreamObject):
+            page[NameObject('/Contents')] = writer._add_object(contents)
+    
+    _compress_unfiltered_streams(writer)
+    _merge_identical_objects(writer)
+    _drop_unreachable_objects(writer)
+
+
+def _compress_unfiltered_streams(writer: PdfWriter) -> None:
+    for i, obj in enumerate(writer._objects):
+        if not isinstance(obj, StreamObject) or NameObject('/Filter') in obj:
+            continue
+        
+        encoded = obj.flate_encode()
+        for key, value in obj.items():
+            if key not in ('/Length', '/Filter'):
+                encoded[key] = value
+        encoded.indirect_reference = IndirectObject(i + 1, 0, writer)
+        writer._objects[i] = encoded
+
+
+def _serialize(obj) -> bytes:
+    buffer = BytesIO()
+    obj.write_to_stream(buffer, None)
+    return buffer.getvalue()
+
+
+def _must_stay_distinct(obj: DictionaryObject) -> bool:
+    if obj.get('/Type') in _STRUCTURAL_TYPES:
+        return True
+    # /Type is optional on annotations; a plain dictionary with a /Subtype
+    # and no /Type is most likely one. Streams (images, forms) can still merge.
+    return not isinstance(obj, StreamObject) and '/Subtype' in obj and '/Type' not in obj
+
+
+def _merge_identical_objects(writer: PdfWriter) -> None:
+    # Merging objects can make their parents identical too, so repeat until stable
+    while True:
+        first_seen = {}
+        replacements = {}
+        for i, obj in enumerate(writer._objects):
+            if obj is None:
+                continue
+            if isinstance(obj, DictionaryObject) and _must_stay_distinct(obj):
+                continue
+            if writer._info is not None and i + 1 == writer._info.idnum:
+                continue
+            
+            key = _serialize(obj)
+            if key in first_seen:
+                replacements[i + 1] = first_seen[key]
+            else:
+                first_seen[key] = i + 1
+        
+        if not replacements:
+            return
+        
+        _rewrite_references(writer, replacements)
+        for idnum in replacements:
+            writer._objects[idnum - 1] = None
+
+
+def _drop_unreachable_objects(writer: PdfWriter) -> None:
+    reachable = set()
+    stack = [writer._root, writer._info]
+    while stack:
+        ref = stack.pop()
+        if ref is None or ref.idnum in reachable:
+            continue
+        reachable.add(ref.idnum)
+        stack.extend(_child_references(writer._objects[ref.idnum - 1]))
+    
+    new_numbers = {}
+    kept = []
+    for i, obj in enumerate(writer._objects):
+        if i + 1 in reachable:
+            kept.append(obj)
+            new_numbers[i + 1] = len(kept)
+    
+    writer._objects = kept
+    _rewrite_references(writer, new_numbers)
+    for i, obj in enumerate(writer._objects):
+        obj.indirect_reference = IndirectObject(i + 1, 0, writer)
+    for ref in (writer._root, writer._info, writer._pages):
+        if ref is not None:
+            ref.idnum = new_numbers[ref.idnum]
+
+
+def _child_references(obj):
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, IndirectObject):
+            yield item
+        elif isinstance(item, DictionaryObject):
+            stack.extend(item.values())
+        elif isinstance(item, ArrayObject):
+            stack.extend(item)
+
+
+def _rewrite_references(writer: PdfWriter, mapping: dict) -> None:
+    """Point every reference to an old object number at its mapped number"""
+    def remap(item):
+        if isinstance(item, IndirectObject) and item.idnum in mapping:
+            return IndirectObject(mapping[item.idnum], 0, writer)
+        if isinstance(item, DictionaryObject):
+            for key, value in list(item.items()):
+                item[key] = remap(value)
+        elif isinstance(item, ArrayObject):
+            for idx, value in enumerate(item):
+                item[idx] = remap(value)
+        return item
+    
+    for obj in writer._objects:
+        if obj is not None:
+            remap(obj)
+
+
+# Rough bytes added per object for its "N 0 obj ... endobj" wrapper and xref entry
+OBJECT_OVERHEAD = 40
+
+# Rough bytes for the header, catalog, page tree, info dictionary and trailer
+FILE_OVERHEAD = 400
+
+
+def page_object_sizes(page: DictionaryObject, cache: Optional[Dict[int, int]] = None) -> Dict[int, int]:
+    """
+    Estimate the serialized size of every object a page pulls into an output.
+    
+    Follows references from the page dictionary (content streams, fonts,
+    images, XObjects and other resources) without crossing into the page tree
+    or into other pages.
+    
+    Args:
+        page (DictionaryObject): Page object from a PdfReader
+        cache (Dict[int, int], optional): Sizes of objects already measured,
+                                          keyed by object number. Shared
+                                          resources are only serialized once.
+    
+    Returns:
+        Dict[int, int]: Estimated bytes per object number, page included
+    """
+    if cache is None:
+        cache = {}
+    
+    own_fields = DictionaryObject({k: v for k, v in page.items() if k != '/Parent'})
+    sizes = {page.indirect_reference.idnum: len(_serialize(own_fields)) + OBJECT_OVERHEAD}
+    stack = list(_child_references(own_fields))
+    while stack:
+        ref = stack.pop()
+        if ref.idnum in sizes:
+            continue
+        
+        obj = ref.get_object()
+        if isinstance(obj, DictionaryObject) and obj.get('/Type') in _STRUCTURAL_TYPES:
+            continue
+        
+        if ref.idnum not in cache:
+            cache[ref.idnum] = len(_serialize(obj)) + OBJECT_OVERHEAD
+        sizes[ref.idnum] = cache[ref.idnum]
+        stack.extend(_child_references(obj))
+    
+    return sizes
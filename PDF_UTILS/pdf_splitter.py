@@ -3,9 +3,129 @@ PDF Splitter Module
 A utility class for splitting PDF files into multiple pieces
 """
 
+import mmap
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
 from PyPDF2 import PdfReader, PdfWriter
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict, Iterator, Callable, BinaryIO
+
+try:
+    from .pdf_optimizer import optimize_writer, measure_size, page_object_sizes, FILE_OVERHEAD
+except ImportError:
+    from pdf_optimizer import optimize_writer, measure_size, page_object_sizes, FILE_OVERHEAD
+
+try:
+    from .split_plan import SplitPlan
+    from .progress import ProgressEvent
+    from .page_index import PageIndex, content_hash
+    from .split_checkpoint import SplitCheckpoint, write_atomically
+    from .pdf_images import ImageRecompressor
+except ImportError:
+    from split_plan import SplitPlan
+    from progress import ProgressEvent
+    from page_index import PageIndex, content_hash
+    from split_checkpoint import SplitCheckpoint, write_atomically
+    from pdf_images import ImageRecompressor
+
+
+def _write_part(pdf_path: str, page_indices: List[int], output_file: str,
+                use_mmap: bool = False, optimize: bool = False,
+                images: Optional[ImageRecompressor] = None) -> Dict[str, float]:
+    """
+    Write the given pages of a PDF to a new file.
+    
+    Runs inside a worker process, so it opens its own PdfReader
+    instead of sharing the one held by the PDFSplitter.
+    
+    Args:
+        pdf_path (str): Path to the source PDF file
+        page_indices (List[int]): 0-based page indices to copy, in order
+        output_file (str): Path of the PDF file to create
+        use_mmap (bool): Read the source through a read-only memory map
+        optimize (bool): Deduplicate objects and compress streams before writing
+        images (ImageRecompressor, optional): Downsample and recompress images before writing
+    
+    Returns:
+        Dict[str, float]: Part statistics, see _save_writer
+    """
+    if use_mmap:
+        with open(pdf_path, 'rb') as fh, \
+                mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return _write_part_from(PdfReader(mapped), page_indices, output_file, optimize,
+                                    images=images)
+    
+    return _write_part_from(PdfReader(pdf_path), page_indices, output_file, optimize,
+                            images=images)
+
+
+def _write_part_from(reader: PdfReader, page_indices: List[int], output_file: str,
+                     optimize: bool = False,
+                     on_page: Optional[Callable[[int], None]] = None,
+                     images: Optional[ImageRecompressor] = None) -> Dict[str, float]:
+    """
+    Write the given pages of an open reader to a new file.
+    
+    Args:
+        reader (PdfReader): Reader for the source PDF
+        page_indices (List[int]): 0-based page indices to copy, in order
+        output_file (str): Path of the PDF file to create
+        optimize (bool): Deduplicate objects and compress streams before writing
+        on_page (Callable[[int], None], optional): Called with the number of
+                                                   pages copied so far
+        images (ImageRecompressor, optional): Downsample and recompress images before writing
+    
+    Returns:
+        Dict[str, float]: Part statistics, see _save_writer
+    """
+    copy_start = time.perf_counter()
+    writer = PdfWriter()
+    for copied, i in enumerate(page_indices, 1):
+        writer.add_page(reader.pages[i])
+        if on_page is not None:
+            on_page(copied)
+    copy_seconds = time.perf_counter() - copy_start
+    
+    stats = _save_writer(writer, output_file, optimize, images)
+    stats['copy_seconds'] = copy_seconds
+    return stats
+
+
+def _save_writer(writer: PdfWriter, output_file: str, optimize: bool = False,
+                 images: Optional[ImageRecompressor] = None) -> Dict[str, float]:
+    """
+    Write a filled PdfWriter to disk, optionally shrinking it first.
+    
+    The file is written under a temporary name and renamed into place, so
+    a crash never leaves a truncated PDF at output_file.
+    
+    Args:
+        writer (PdfWriter): Writer with all its pages added
+        output_file (str): Path of the PDF file to create
+        optimize (bool): Deduplicate objects and compress streams before writing
+        images (ImageRecompressor, optional): Downsample and recompress images before writing
+    
+    Returns:
+        Dict[str, float]: bytes_written, bytes_saved (0 unless optimize or
+                          images is set) and write_seconds
+    """
+    write_start = time.perf_counter()
+    original_size = None
+    if optimize or images is not None:
+        original_size = measure_size(writer)
+    if images is not None:
+        images.apply(writer)
+    if optimize:
+        optimize_writer(writer)
+    
+    written = write_atomically(output_file, writer.write)
+    
+    return {
+        'bytes_written': written,
+        'bytes_saved': original_size - written if original_size is not None else 0,
+        'write_seconds': time.perf_counter() - write_start,
+    }
 
 
 class PDFSplitter:
@@ -16,14 +136,43 @@ class PDFSplitter:
         pdf_path (str): Path to the input PDF file
         reader (PdfReader): PyPDF2 reader object
         total_pages (int): Total number of pages in the PDF
+        lazy (bool): Whether the splitter was opened in lazy, low-memory mode
+        use_mmap (bool): Whether the input is read through a memory map
+        bytes_saved (Dict[str, int]): Bytes saved per output file by the last
+                                      split run with optimize=True
+        progress (Callable[[ProgressEvent], None]): Receives progress events, or None
+        quiet (bool): Whether status printing is turned off
+        page_index (PageIndex): Full-text index used by extract_matching and
+                                split_at_matches, opened when first needed
     """
     
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, lazy: bool = False, use_mmap: bool = False,
+                 progress: Optional[Callable[[ProgressEvent], None]] = None,
+                 quiet: bool = False, page_index: Optional[PageIndex] = None):
         """
         Initialize the PDFSplitter with a PDF file.
         
         Args:
             pdf_path (str): Path to the PDF file to be split
+            lazy (bool): If True, read only the trailer, xref and page tree.
+                         The file is read from disk on demand instead of being
+                         buffered in memory, the page count is taken from the
+                         page tree's /Count entry, and page objects are loaded
+                         only when a split method needs them.
+            use_mmap (bool): If True, read the input through a read-only
+                             memory map of the file instead of a private
+                             in-memory copy. Splitters in different processes
+                             then share the file's pages through the OS page
+                             cache. Worker processes map the file as well.
+            progress (Callable[[ProgressEvent], None], optional): Called with a
+                             ProgressEvent for the start and end of every
+                             operation and part, and for each page copied.
+                             Use progress.ProgressBar for a terminal display.
+            quiet (bool): If True, the split methods print nothing
+            page_index (PageIndex, optional): Index of page text used by
+                             extract_matching and split_at_matches. If None,
+                             a PageIndex at page_index.DEFAULT_INDEX_PATH is
+                             opened the first time one of them is called.
             
         Raises:
             FileNotFoundError: If the PDF file doesn't exist
@@ -33,10 +182,36 @@ class PDFSplitter:
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
         
         self.pdf_path = pdf_path
+        self.lazy = lazy
+        self.use_mmap = use_mmap
+        self._stream = None
+        self._mmap = None
+        self.bytes_saved = {}
+        self.progress = progress
+        self.quiet = quiet
+        self._operation = None
+        self._started = 0.0
+        self._totals = {}
+        self.page_index = page_index
+        self._owns_index = False
+        self._content_hash = None
         try:
-            self.reader = PdfReader(pdf_path)
-            self.total_pages = len(self.reader.pages)
+            if lazy or use_mmap:
+                self._stream = open(pdf_path, 'rb')
+                if use_mmap:
+                    self._mmap = mmap.mmap(self._stream.fileno(), 0, access=mmap.ACCESS_READ)
+                    self.reader = PdfReader(self._mmap)
+                else:
+                    self.reader = PdfReader(self._stream)
+            else:
+                self.reader = PdfReader(pdf_path)
+            
+            if lazy:
+                self.total_pages = int(self.reader.trailer["/Root"]["/Pages"]["/Count"])
+            else:
+                self.total_pages = len(self.reader.pages)
         except Exception as e:
+            self.close()
             raise Exception(f"Error reading PDF file: {str(e)}")
     
     def get_total_pages(self) -> int:
@@ -48,8 +223,187 @@ class PDFSplitter:
         """
         return self.total_pages
     
+    def release_pages(self) -> None:
+        """
+        Release the page objects loaded so far.
+        
+        Drops the reader's flattened page list and its cache of resolved
+        objects. Pages are loaded again from the file the next time a split
+        method needs them.
+        """
+        self.reader.flattened_pages = None
+        self.reader.resolved_objects.clear()
+        self.reader._page_id2num = None
+    
+    def close(self) -> None:
+        """
+        Close the file handle and memory map held open in lazy or mmap mode.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self._owns_index:
+            self.page_index.close()
+            self.page_index = None
+            self._owns_index = False
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def _log(self, message: str) -> None:
+        """Print a status message unless the splitter is quiet"""
+        if not self.quiet:
+            print(message)
+    
+    def _emit(self, kind: str, **fields) -> None:
+        """Send a ProgressEvent for the current operation to the progress callback"""
+        if self.progress is not None:
+            self.progress(ProgressEvent(kind, self._operation,
+                                        elapsed=time.perf_counter() - self._started,
+                                        **fields))
+    
+    def _begin(self, operation: str, part_count: Optional[int], pages_total: int) -> None:
+        """Start timing an operation and emit its 'start' event"""
+        self._operation = operation
+        self._started = time.perf_counter()
+        self._totals = {'parts': 0, 'pages': 0, 'bytes_written': 0,
+                        'copy_seconds': 0.0, 'write_seconds': 0.0}
+        self.bytes_saved = {}
+        self._emit('start', part_count=part_count, pages_total=pages_total)
+    
+    def _part_done(self, part_index: int, output_file: str, pages: int,
+                   stats: Dict[str, float], optimize: bool = False) -> None:
+        """Record a finished part and emit its 'part_end' event"""
+        if optimize:
+            self.bytes_saved[output_file] = stats['bytes_saved']
+        self._totals['parts'] += 1
+        self._totals['pages'] += pages
+        self._totals['bytes_written'] += stats['bytes_written']
+        self._totals['copy_seconds'] += stats.get('copy_seconds', 0.0)
+        self._totals['write_seconds'] += stats.get('write_seconds', 0.0)
+        self._emit('part_end', part_index=part_index, output_file=output_file,
+                   pages_copied=pages, pages_total=pages,
+                   bytes_written=stats['bytes_written'], bytes_saved=stats['bytes_saved'],
+                   copy_seconds=stats.get('copy_seconds', 0.0),
+                   write_seconds=stats.get('write_seconds', 0.0))
+    
+    def _finish(self) -> None:
+        """Emit the 'finish' event with the totals of the current operation"""
+        self._emit('finish', part_count=self._totals['parts'],
+                   pages_copied=self._totals['pages'], pages_total=self._totals['pages'],
+                   bytes_written=self._totals['bytes_written'],
+                   bytes_saved=sum(self.bytes_saved.values()),
+                   copy_seconds=self._totals['copy_seconds'],
+                   write_seconds=self._totals['write_seconds'])
+    
+    def _write_parts(self, parts: List[Tuple[List[int], str]], operation: str,
+                     workers: int = 1, optimize: bool = False,
+                     checkpoint: bool = False, resume: bool = False,
+                     images: Optional[ImageRecompressor] = None) -> None:
+        """
+        Write several parts, either serially or across a process pool.
+        
+        Args:
+            parts (List[Tuple[List[int], str]]): (0-based page indices, output file) pairs
+            operation (str): Name of the calling method, reported in progress events
+            workers (int): Number of worker processes. 1 writes serially
+                           with the shared reader.
+            optimize (bool): Deduplicate objects and compress streams in each
+                             part, recording the bytes saved in self.bytes_saved
+            checkpoint (bool): Record finished parts in a SplitCheckpoint next
+                               to the outputs, removed once all parts are written
+            resume (bool): Skip the parts an earlier, interrupted run of the
+                           same split recorded as finished
+            images (ImageRecompressor, optional): Downsample and recompress the
+                           images in each part. Bytes saved are recorded as
+                           with optimize.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        
+        shrink = optimize or images is not None
+        
+        record = None
+        if checkpoint and parts:
+            base_name = os.path.splitext(os.path.basename(self.pdf_path))[0]
+            output_dir = os.path.dirname(parts[0][1]) or '.'
+            record = SplitCheckpoint(SplitCheckpoint.path_for(output_dir, base_name, operation),
+                                       self.pdf_path, operation, parts)
+            if resume and record.load():
+                self._log(f"↩️  Resuming: {len(record.completed)} of {len(parts)} parts already written")
+            record.start()
+        
+        self._begin(operation, len(parts), sum(len(page_indices) for page_indices, _ in parts))
+        
+        todo = []
+        for part_index, (page_indices, output_file) in enumerate(parts):
+            if record is not None and record.is_done(output_file):
+                self._part_done(part_index, output_file, len(page_indices),
+                                {'bytes_written': record.completed[output_file], 'bytes_saved': 0})
+            else:
+                todo.append(part_index)
+        
+        if workers == 1 or len(todo) < 2:
+            for part_index in todo:
+                page_indices, output_file = parts[part_index]
+                self._emit('part_start', part_index=part_index, part_count=len(parts),
+                           output_file=output_file, pages_total=len(page_indices))
+                
+                def on_page(copied, part_index=part_index, page_indices=page_indices):
+                    self._emit('page', part_index=part_index, pages_copied=copied,
+                               pages_total=len(page_indices))
+                
+                stats = _write_part_from(self.reader, page_indices, output_file, optimize,
+                                         on_page if self.progress is not None else None, images)
+                self._part_done(part_index, output_file, len(page_indices), stats, shrink)
+                if record is not None:
+                    record.mark_done(output_file, stats['bytes_written'])
+        else:
+            # Parts already run in parallel, so each one recompresses its images serially
+            if images is not None:
+                images = images.with_workers(1)
+            
+            with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+                futures = {}
+                for part_index in todo:
+                    page_indices, output_file = parts[part_index]
+                    self._emit('part_start', part_index=part_index, part_count=len(parts),
+                               output_file=output_file, pages_total=len(page_indices))
+                    futures[pool.submit(_write_part, self.pdf_path, page_indices, output_file,
+                                        self.use_mmap, optimize, images)] = part_index
+                
+                for future in as_completed(futures):
+                    part_index = futures[future]
+                    page_indices, output_file = parts[part_index]
+                    stats = future.result()
+                    self._part_done(part_index, output_file, len(page_indices), stats, shrink)
+                    if record is not None:
+                        record.mark_done(output_file, stats['bytes_written'])
+            
+            # Keep bytes_saved in part order regardless of completion order
+            self.bytes_saved = {output_file: self.bytes_saved[output_file]
+                                for _, output_file in parts if output_file in self.bytes_saved}
+        
+        if record is not None:
+            record.remove()
+        self._finish()
+    
+    def _saved_note(self, output_file: str) -> str:
+        """Format the bytes saved for an output file, or '' if it wasn't optimized"""
+        if output_file not in self.bytes_saved:
+            return ""
+        return f", saved {self.bytes_saved[output_file] / 1024:.1f} KB"
+    
     def split_into_two(self, split_at_page: Optional[int] = None, 
-                       output_dir: Optional[str] = None) -> Tuple[str, str]:
+                       output_dir: Optional[str] = None,
+                       optimize: bool = False, resume: bool = False,
+                       images: Optional[ImageRecompressor] = None) -> Tuple[str, str]:
         """
         Split the PDF into two pieces.
         
@@ -58,6 +412,16 @@ class PDFSplitter:
                                           If None, splits at the middle.
             output_dir (str, optional): Directory to save output files.
                                        If None, uses the same directory as input.
+            optimize (bool): Deduplicate identical objects and compress streams
+                             in each part. Bytes saved per part are printed
+                             and stored in self.bytes_saved.
+            resume (bool): Skip parts already written by an earlier run of the
+                           same split that was interrupted. Finished parts are
+                           recorded in a checkpoint file next to the outputs
+                           until the whole split completes.
+            images (ImageRecompressor, optional): Downsample images to a target
+                           DPI and recompress them as JPEGs in each part. Bytes
+                           saved per part are printed and stored in self.bytes_saved.
         
         Returns:
             Tuple[str, str]: Paths to the two output PDF files
@@ -86,36 +450,41 @@ class PDFSplitter:
         output_file1 = os.path.join(output_dir, f"{base_name}_part1.pdf")
         output_file2 = os.path.join(output_dir, f"{base_name}_part2.pdf")
         
-        # Create first part (pages 0 to split_at_page-1)
-        writer1 = PdfWriter()
-        for i in range(split_at_page):
-            writer1.add_page(self.reader.pages[i])
-        
-        with open(output_file1, 'wb') as f:
-            writer1.write(f)
-        
-        # Create second part (pages split_at_page to end)
-        writer2 = PdfWriter()
-        for i in range(split_at_page, self.total_pages):
-            writer2.add_page(self.reader.pages[i])
-        
-        with open(output_file2, 'wb') as f:
-            writer2.write(f)
+        # First part is pages 0 to split_at_page-1, second part is the rest
+        self._write_parts([
+            (list(range(split_at_page)), output_file1),
+            (list(range(split_at_page, self.total_pages)), output_file2),
+        ], 'split_into_two', optimize=optimize, checkpoint=True, resume=resume, images=images)
         
-        print(f"✓ Split complete!")
-        print(f"  Part 1: {output_file1} (Pages 1-{split_at_page})")
-        print(f"  Part 2: {output_file2} (Pages {split_at_page + 1}-{self.total_pages})")
+        self._log(f"✓ Split complete!")
+        self._log(f"  Part 1: {output_file1} (Pages 1-{split_at_page}{self._saved_note(output_file1)})")
+        self._log(f"  Part 2: {output_file2} (Pages {split_at_page + 1}-{self.total_pages}{self._saved_note(output_file2)})")
         
         return output_file1, output_file2
     
     def split_into_n_parts(self, n_parts: int, 
-                          output_dir: Optional[str] = None) -> List[str]:
+                          output_dir: Optional[str] = None,
+                          workers: int = 1, optimize: bool = False,
+                          resume: bool = False,
+                          images: Optional[ImageRecompressor] = None) -> List[str]:
         """
         Split the PDF into N equal (or nearly equal) parts.
         
         Args:
             n_parts (int): Number of parts to split the PDF into
             output_dir (str, optional): Directory to save output files
+            workers (int): Number of worker processes used to write the parts.
+                           Each worker opens its own reader. Defaults to 1 (serial).
+            optimize (bool): Deduplicate identical objects and compress streams
+                             in each part. Bytes saved per part are printed
+                             and stored in self.bytes_saved.
+            resume (bool): Skip parts already written by an earlier run of the
+                           same split that was interrupted. Finished parts are
+                           recorded in a checkpoint file next to the outputs
+                           until the whole split completes.
+            images (ImageRecompressor, optional): Downsample images to a target
+                           DPI and recompress them as JPEGs in each part. Bytes
+                           saved per part are printed and stored in self.bytes_saved.
         
         Returns:
             List[str]: List of paths to the output PDF files
@@ -139,39 +508,52 @@ class PDFSplitter:
         pages_per_part = self.total_pages // n_parts
         remainder = self.total_pages % n_parts
         
-        output_files = []
+        parts = []
         current_page = 0
         
         for part_num in range(n_parts):
             # Add one extra page to first 'remainder' parts
             pages_in_this_part = pages_per_part + (1 if part_num < remainder else 0)
             
-            # Create writer for this part
-            writer = PdfWriter()
-            for i in range(current_page, current_page + pages_in_this_part):
-                writer.add_page(self.reader.pages[i])
-            
-            # Save this part
             output_file = os.path.join(output_dir, f"{base_name}_part{part_num + 1}.pdf")
-            with open(output_file, 'wb') as f:
-                writer.write(f)
-            
-            output_files.append(output_file)
-            print(f"  Part {part_num + 1}: {output_file} (Pages {current_page + 1}-{current_page + pages_in_this_part})")
+            parts.append((list(range(current_page, current_page + pages_in_this_part)), output_file))
             
             current_page += pages_in_this_part
         
-        print(f"✓ Split into {n_parts} parts complete!")
+        self._write_parts(parts, 'split_into_n_parts', workers=workers, optimize=optimize,
+                          checkpoint=True, resume=resume, images=images)
+        
+        output_files = []
+        for part_num, (page_indices, output_file) in enumerate(parts):
+            output_files.append(output_file)
+            self._log(f"  Part {part_num + 1}: {output_file} (Pages {page_indices[0] + 1}-{page_indices[-1] + 1}{self._saved_note(output_file)})")
+        
+        self._log(f"✓ Split into {n_parts} parts complete!")
         return output_files
     
     def split_by_ranges(self, page_ranges: List[Tuple[int, int]], 
-                       output_dir: Optional[str] = None) -> List[str]:
+                       output_dir: Optional[str] = None,
+                       workers: int = 1, optimize: bool = False,
+                       resume: bool = False,
+                       images: Optional[ImageRecompressor] = None) -> List[str]:
         """
         Split the PDF by specific page ranges.
         
         Args:
             page_ranges (List[Tuple[int, int]]): List of (start, end) page tuples (1-based, inclusive)
             output_dir (str, optional): Directory to save output files
+            workers (int): Number of worker processes used to write the parts.
+                           Each worker opens its own reader. Defaults to 1 (serial).
+            optimize (bool): Deduplicate identical objects and compress streams
+                             in each part. Bytes saved per part are printed
+                             and stored in self.bytes_saved.
+            resume (bool): Skip parts already written by an earlier run of the
+                           same split that was interrupted. Finished parts are
+                           recorded in a checkpoint file next to the outputs
+                           until the whole split completes.
+            images (ImageRecompressor, optional): Downsample images to a target
+                           DPI and recompress them as JPEGs in each part. Bytes
+                           saved per part are printed and stored in self.bytes_saved.
         
         Returns:
             List[str]: List of paths to the output PDF files
@@ -188,37 +570,169 @@ class PDFSplitter:
         # Get base filename
         base_name = os.path.splitext(os.path.basename(self.pdf_path))[0]
         
-        output_files = []
+        parts = []
         
-        for idx, (start, end) in enumerate(page_ranges):
+        for start, end in page_ranges:
             # Validate range
             if start < 1 or end > self.total_pages or start > end:
                 raise ValueError(f"Invalid page range: ({start}, {end})")
             
-            # Create writer for this range
-            writer = PdfWriter()
-            for i in range(start - 1, end):  # Convert to 0-based index
-                writer.add_page(self.reader.pages[i])
-            
-            # Save this part
             output_file = os.path.join(output_dir, f"{base_name}_pages{start}-{end}.pdf")
-            with open(output_file, 'wb') as f:
-                writer.write(f)
+            parts.append((list(range(start - 1, end)), output_file))  # Convert to 0-based index
+        
+        self._write_parts(parts, 'split_by_ranges', workers=workers, optimize=optimize,
+                          checkpoint=True, resume=resume, images=images)
+        
+        output_files = []
+        for idx, ((start, end), (_, output_file)) in enumerate(zip(page_ranges, parts)):
+            output_files.append(output_file)
+            self._log(f"  Range {idx + 1}: {output_file} (Pages {start}-{end}{self._saved_note(output_file)})")
+        
+        self._log(f"✓ Split by ranges complete!")
+        return output_files
+    
+    def split_by_max_bytes(self, max_bytes: int,
+                           output_dir: Optional[str] = None,
+                           optimize: bool = False) -> List[str]:
+        """
+        Split the PDF into as few parts as possible, each at most max_bytes.
+        
+        Parts are filled greedily in page order. The size of each candidate
+        page is estimated from the objects it would add to the current part
+        (resources shared with pages already in the part are counted once),
+        scaled by how far off the estimate was for the previous part. Each
+        part is rendered in memory and checked against the limit before it is
+        written; if the estimate was too low, pages are moved to the next part.
+        
+        Args:
+            max_bytes (int): Maximum size of each output file in bytes
+            output_dir (str, optional): Directory to save output files
+            optimize (bool): Deduplicate identical objects and compress streams
+                             in each part before checking its size
+        
+        Returns:
+            List[str]: List of paths to the output PDF files
+        
+        Raises:
+            ValueError: If a single page can't fit within max_bytes
+        
+        Example:
+            parts = splitter.split_by_max_bytes(10 * 1024 * 1024)  # 10 MB parts
+        """
+        if max_bytes <= FILE_OVERHEAD:
+            raise ValueError(f"max_bytes must be greater than {FILE_OVERHEAD}")
+        
+        # Determine output directory
+        if output_dir is None:
+            output_dir = os.path.dirname(self.pdf_path)
+        else:
+            os.makedirs(output_dir, exist_ok=True)
+        
+        # Get base filename
+        base_name = os.path.splitext(os.path.basename(self.pdf_path))[0]
+        
+        self._begin('split_by_max_bytes', None, self.total_pages)
+        size_cache = {}
+        correction = 1.0
+        output_files = []
+        next_page = 0
+        
+        while next_page < self.total_pages:
+            # Grow the part while the corrected estimate stays under the limit
+            part_objects = {}
+            estimate = FILE_OVERHEAD
+            end = next_page
+            while end < self.total_pages:
+                page_sizes = page_object_sizes(self.reader.pages[end], size_cache)
+                added = sum(size for idnum, size in page_sizes.items() if idnum not in part_objects)
+                if end > next_page and (estimate + added) * correction > max_bytes:
+                    break
+                part_objects.update(page_sizes)
+                estimate += added
+                end += 1
+            
+            # Render the part and back off until it really fits
+            while True:
+                data, stats = self._render_part(range(next_page, end), optimize)
+                if len(data) <= max_bytes:
+                    break
+                if end - next_page == 1:
+                    raise ValueError(f"Page {next_page + 1} alone is {len(data)} bytes, "
+                                     f"more than max_bytes ({max_bytes})")
+                end = next_page + max(1, int((end - next_page) * max_bytes / len(data)))
+                estimate = None
+            
+            if estimate is not None:
+                correction = len(data) / estimate
+            
+            output_file = os.path.join(output_dir, f"{base_name}_part{len(output_files) + 1}.pdf")
+            self._emit('part_start', part_index=len(output_files), output_file=output_file,
+                       pages_total=end - next_page)
+            write_start = time.perf_counter()
+            write_atomically(output_file, lambda f: f.write(data))
+            stats['write_seconds'] += time.perf_counter() - write_start
+            self._part_done(len(output_files), output_file, end - next_page, stats, optimize)
             
             output_files.append(output_file)
-            print(f"  Range {idx + 1}: {output_file} (Pages {start}-{end})")
+            self._log(f"  Part {len(output_files)}: {output_file} (Pages {next_page + 1}-{end}, "
+                      f"{len(data) / 1024:.1f} KB{self._saved_note(output_file)})")
+            
+            next_page = end
         
-        print(f"✓ Split by ranges complete!")
+        self._finish()
+        self._log(f"✓ Split into {len(output_files)} parts of at most {max_bytes} bytes!")
         return output_files
     
+    def _render_part(self, page_indices, optimize: bool = False) -> Tuple[bytes, Dict[str, float]]:
+        """
+        Build a part in memory.
+        
+        Args:
+            page_indices: 0-based page indices to copy, in order
+            optimize (bool): Deduplicate objects and compress streams first
+        
+        Returns:
+            Tuple[bytes, Dict[str, float]]: The serialized PDF and its statistics
+                                            (bytes_written, bytes_saved,
+                                            copy_seconds, write_seconds)
+        """
+        copy_start = time.perf_counter()
+        writer = PdfWriter()
+        for i in page_indices:
+            writer.add_page(self.reader.pages[i])
+        copy_seconds = time.perf_counter() - copy_start
+        
+        write_start = time.perf_counter()
+        original_size = None
+        if optimize:
+            original_size = measure_size(writer)
+            optimize_writer(writer)
+        
+        buffer = BytesIO()
+        writer.write(buffer)
+        data = buffer.getvalue()
+        return data, {
+            'bytes_written': len(data),
+            'bytes_saved': original_size - len(data) if optimize else 0,
+            'copy_seconds': copy_seconds,
+            'write_seconds': time.perf_counter() - write_start,
+        }
+    
     def extract_pages(self, pages: List[int], 
-                     output_file: Optional[str] = None) -> str:
+                     output_file: Optional[str] = None,
+                     optimize: bool = False,
+                     images: Optional[ImageRecompressor] = None) -> str:
         """
         Extract specific pages into a new PDF.
         
         Args:
             pages (List[int]): List of page numbers to extract (1-based)
             output_file (str, optional): Output file path
+            optimize (bool): Deduplicate identical objects and compress streams
+                             in the output. Bytes saved are printed and stored
+                             in self.bytes_saved.
+            images (ImageRecompressor, optional): Downsample images to a target
+                                                  DPI and recompress them as JPEGs
         
         Returns:
             str: Path to the output PDF file
@@ -234,15 +748,271 @@ class PDFSplitter:
             output_dir = os.path.dirname(self.pdf_path)
             output_file = os.path.join(output_dir, f"{base_name}_extracted.pdf")
         
-        # Create writer
-        writer = PdfWriter()
-        for page_num in pages:
-            writer.add_page(self.reader.pages[page_num - 1])  # Convert to 0-based
-        
-        # Save
-        with open(output_file, 'wb') as f:
-            writer.write(f)
+        # Convert to 0-based and write
+        self._write_parts([([page_num - 1 for page_num in pages], output_file)], 'extract_pages',
+                          optimize=optimize, images=images)
         
-        print(f"✓ Extracted {len(pages)} pages to: {output_file}")
+        self._log(f"✓ Extracted {len(pages)} pages to: {output_file}{self._saved_note(output_file)}")
         return output_file
-
+    
+    def _indexed_document(self) -> str:
+        """Make sure this PDF's page text is in the page index and return its content hash"""
+        if self.page_index is None:
+            self.page_index = PageIndex()
+            self._owns_index = True
+        if self._content_hash is None:
+            self._content_hash = content_hash(self.pdf_path)
+        
+        if not self.page_index.is_indexed(self._content_hash):
+            self._log(f"🔎 Indexing text of {self.total_pages} pages...")
+            self.page_index.ensure_indexed(self.pdf_path, self.reader, self._content_hash)
+        return self._content_hash
+    
+    def find_pages(self, query: str, fts_syntax: bool = False) -> List[int]:
+        """
+        Find the pages whose text matches a full-text query.
+        
+        The PDF's text is extracted into the page index on first use; later
+        calls, including from other runs on the same file, only query the index.
+        
+        Args:
+            query (str): Text to look for, matched as a phrase ignoring case and punctuation
+            fts_syntax (bool): Treat query as an SQLite FTS5 query (AND, OR, NOT, prefix*)
+        
+        Returns:
+            List[int]: Matching page numbers (1-based)
+        """
+        doc_hash = self._indexed_document()
+        return self.page_index.search(doc_hash, query, fts_syntax)
+    
+    def extract_matching(self, query: str, output_file: Optional[str] = None,
+                         fts_syntax: bool = False) -> Optional[str]:
+        """
+        Extract the pages whose text matches a query into a new PDF.
+        
+        Args:
+            query (str): Text to look for, e.g. an invoice number
+            output_file (str, optional): Output file path
+            fts_syntax (bool): Treat query as an SQLite FTS5 query (AND, OR, NOT, prefix*)
+        
+        Returns:
+            Optional[str]: Path to the output PDF file, or None if no page matches
+        
+        Example:
+            splitter.extract_matching("INV-0042", output_file="inv_0042.pdf")
+        """
+        pages = self.find_pages(query, fts_syntax)
+        if not pages:
+            self._log(f"⚠️  No pages match: {query}")
+            return None
+        
+        self._log(f"🔎 {len(pages)} pages match {query!r}: {pages}")
+        return self.extract_pages(pages, output_file=output_file)
+    
+    def split_at_matches(self, pattern: str, output_dir: Optional[str] = None,
+                         flags: int = 0, workers: int = 1,
+                         optimize: bool = False) -> List[str]:
+        """
+        Start a new part at every page whose text matches a regular expression.
+        
+        Useful for batches of scanned documents where each one starts with a
+        recognizable header. Pages before the first match form their own part.
+        The pattern is run over the text stored in the page index.
+        
+        Args:
+            pattern (str): Regular expression marking the first page of a part
+            output_dir (str, optional): Directory to save output files
+            flags (int): re module flags, e.g. re.IGNORECASE
+            workers (int): Number of worker processes used to write the parts
+            optimize (bool): Deduplicate identical objects and compress streams
+        
+        Returns:
+            List[str]: List of paths to the output PDF files, empty if no page matches
+        
+        Example:
+            splitter.split_at_matches(r"Invoice No\.\s*INV-\d+")
+        """
+        doc_hash = self._indexed_document()
+        starts = self.page_index.match(doc_hash, pattern, flags)
+        if not starts:
+            self._log(f"⚠️  No pages match: {pattern}")
+            return []
+        
+        if starts[0] != 1:
+            starts.insert(0, 1)
+        ends = [start - 1 for start in starts[1:]] + [self.total_pages]
+        return self.split_by_ranges(list(zip(starts, ends)), output_dir=output_dir,
+                                    workers=workers, optimize=optimize)
+    
+    def run_plan(self, plan, output_dir: Optional[str] = None,
+                 optimize: bool = False) -> List[str]:
+        """
+        Execute a SplitPlan in a single pass over the source pages.
+        
+        Every operation in the plan is validated before anything is written.
+        Each source page is then loaded once and handed to every output that
+        needs it; an output is written and released as soon as its last page
+        has been added.
+        
+        Args:
+            plan (SplitPlan): The operations to run
+            output_dir (str, optional): Directory to save output files.
+                                       If None, uses the same directory as input.
+            optimize (bool): Deduplicate identical objects and compress streams
+                             in each output. Bytes saved per output are printed
+                             and stored in self.bytes_saved.
+        
+        Returns:
+            List[str]: Paths to the output PDF files, in plan order
+        
+        Example:
+            plan = SplitPlan().add_split_into_two().add_ranges([(1, 5)])
+            outputs = splitter.run_plan(plan, output_dir="out")
+        """
+        resolve_dir = output_dir if output_dir is not None else os.path.dirname(self.pdf_path)
+        outputs = plan.resolve(self.total_pages, self.pdf_path, resolve_dir)
+        
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+        
+        # Map each source page to the (output, position) slots that need it
+        consumers = {}
+        for out_idx, (page_indices, _, _) in enumerate(outputs):
+            for pos, page_index in enumerate(page_indices):
+                consumers.setdefault(page_index, []).append((out_idx, pos))
+        
+        self._begin('run_plan', len(outputs), sum(len(page_indices) for page_indices, _, _ in outputs))
+        writers = [PdfWriter() for _ in outputs]
+        pending = [{} for _ in outputs]
+        next_pos = [0] * len(outputs)
+        copy_seconds = [0.0] * len(outputs)
+        
+        for page_index in sorted(consumers):
+            page = self.reader.pages[page_index]
+            for out_idx, pos in consumers[page_index]:
+                pending[out_idx][pos] = page
+                
+                # Add pages in the output's own order, holding back any that arrive early
+                page_indices, output_file, _ = outputs[out_idx]
+                if next_pos[out_idx] == 0 and 0 in pending[out_idx]:
+                    self._emit('part_start', part_index=out_idx, part_count=len(outputs),
+                               output_file=output_file, pages_total=len(page_indices))
+                
+                copy_start = time.perf_counter()
+                while next_pos[out_idx] in pending[out_idx]:
+                    writers[out_idx].add_page(pending[out_idx].pop(next_pos[out_idx]))
+                    next_pos[out_idx] += 1
+                    self._emit('page', part_index=out_idx, pages_copied=next_pos[out_idx],
+                               pages_total=len(page_indices))
+                copy_seconds[out_idx] += time.perf_counter() - copy_start
+                
+                if next_pos[out_idx] == len(page_indices):
+                    stats = _save_writer(writers[out_idx], output_file, optimize)
+                    stats['copy_seconds'] = copy_seconds[out_idx]
+                    self._part_done(out_idx, output_file, len(page_indices), stats, optimize)
+                    writers[out_idx] = None
+        
+        self._finish()
+        
+        output_files = []
+        for idx, (_, output_file, description) in enumerate(outputs):
+            output_files.append(output_file)
+            self._log(f"  Output {idx + 1}: {output_file} ({description}{self._saved_note(output_file)})")
+        
+        self._log(f"✓ Split plan complete! Wrote {len(outputs)} files in one pass")
+        return output_files
+    
+    def iter_plan(self, plan: SplitPlan, optimize: bool = False) -> Iterator[Tuple[str, bytes]]:
+        """
+        Render the outputs of a SplitPlan in memory, one at a time.
+        
+        Nothing touches the disk. Each part is built and yielded before the
+        next one starts, so memory stays bounded to a single part. The whole
+        plan is validated before the first part is yielded.
+        
+        Args:
+            plan (SplitPlan): The operations to run
+            optimize (bool): Deduplicate identical objects and compress streams
+                             in each part
+        
+        Yields:
+            Tuple[str, bytes]: (file name, PDF bytes) for each output. Names are
+                               the ones the file-writing methods would use,
+                               without a directory.
+        
+        Example:
+            for name, data in splitter.iter_plan(SplitPlan().add_split_into_n_parts(4)):
+                bucket.put_object(Key=name, Body=data)
+        """
+        outputs = plan.resolve(self.total_pages, self.pdf_path, '')
+        self._begin('iter_plan', len(outputs), sum(len(page_indices) for page_indices, _, _ in outputs))
+        
+        for part_index, (page_indices, name, _) in enumerate(outputs):
+            self._emit('part_start', part_index=part_index, part_count=len(outputs),
+                       output_file=name, pages_total=len(page_indices))
+            data, stats = self._render_part(page_indices, optimize)
+            self._part_done(part_index, name, len(page_indices), stats, optimize)
+            yield name, data
+        
+        self._finish()
+    
+    def iter_split_into_n_parts(self, n_parts: int,
+                                optimize: bool = False) -> Iterator[Tuple[str, bytes]]:
+        """
+        Generator version of split_into_n_parts that yields (name, bytes) parts.
+        
+        Args:
+            n_parts (int): Number of parts to split the PDF into
+            optimize (bool): Deduplicate identical objects and compress streams
+        
+        Yields:
+            Tuple[str, bytes]: (file name, PDF bytes) for each part
+        """
+        return self.iter_plan(SplitPlan().add_split_into_n_parts(n_parts), optimize)
+    
+    def iter_split_by_ranges(self, page_ranges: List[Tuple[int, int]],
+                             optimize: bool = False) -> Iterator[Tuple[str, bytes]]:
+        """
+        Generator version of split_by_ranges that yields (name, bytes) parts.
+        
+        Args:
+            page_ranges (List[Tuple[int, int]]): List of (start, end) page tuples (1-based, inclusive)
+            optimize (bool): Deduplicate identical objects and compress streams
+        
+        Yields:
+            Tuple[str, bytes]: (file name, PDF bytes) for each range
+        """
+        return self.iter_plan(SplitPlan().add_ranges(page_ranges), optimize)
+    
+    def write_plan_to(self, plan: SplitPlan, open_sink: Callable[[str], BinaryIO],
+                      optimize: bool = False) -> List[str]:
+        """
+        Write the outputs of a SplitPlan to caller-supplied sinks.
+        
+        open_sink is called with each output's file name and must return a
+        writable binary object (BytesIO, socket.makefile('wb'), an object-store
+        upload stream, ...). Sinks only need a write() method; the bytes of one
+        part are written in a single call and the sink is flushed if it
+        supports it. The caller owns the sink and is responsible for closing it.
+        
+        Args:
+            plan (SplitPlan): The operations to run
+            open_sink (Callable[[str], BinaryIO]): Returns the sink for a file name
+            optimize (bool): Deduplicate identical objects and compress streams
+        
+        Returns:
+            List[str]: File names of the outputs, in plan order
+        
+        Example:
+            buffers = {}
+            splitter.write_plan_to(plan, lambda name: buffers.setdefault(name, BytesIO()))
+        """
+        names = []
+        for name, data in self.iter_plan(plan, optimize):
+            sink = open_sink(name)
+            sink.write(data)
+            if hasattr(sink, 'flush'):
+                sink.flush()
+            names.append(name)
+        
+        return names
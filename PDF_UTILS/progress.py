@@ -0,0 +1,125 @@
+"""
+Progress Module
+Progress events emitted by PDFSplitter and a terminal progress bar that renders them
+"""
+
+import sys
+import time
+from typing import Optional, Dict
+
+
+class ProgressEvent:
+    """
+    A progress report from a PDFSplitter operation.
+    
+    Event kinds, in the order they are emitted:
+        'start'       once per operation; part_count and pages_total are set
+        'part_start'  before a part's pages are copied
+        'page'        after each page is copied into a part (serial runs only;
+                      worker processes report whole parts)
+        'part_end'    after a part is written; bytes and timings are set
+        'finish'      once per operation; totals for the whole run
+    
+    Attributes:
+        kind (str): One of the event kinds above
+        operation (str): Name of the PDFSplitter method that emitted the event
+        part_index (int): 0-based index of the part, None for start/finish
+        part_count (int): Number of parts in the operation, if known up front
+        output_file (str): Output file path or name of the part
+        pages_copied (int): Pages copied so far (into the part, or in total for finish)
+        pages_total (int): Pages in the part (or in the whole operation for start/finish)
+        bytes_written (int): Bytes written for the part (or in total for finish)
+        bytes_saved (int): Bytes saved by optimization for the part
+        copy_seconds (float): Time spent copying pages into the writer
+        write_seconds (float): Time spent optimizing, serializing and writing
+        elapsed (float): Seconds since the operation started
+    """
+    
+    def __init__(self, kind: str, operation: str, part_index: Optional[int] = None,
+                 part_count: Optional[int] = None, output_file: Optional[str] = None,
+                 pages_copied: int = 0, pages_total: int = 0, bytes_written: int = 0,
+                 bytes_saved: int = 0, copy_seconds: float = 0.0,
+                 write_seconds: float = 0.0, elapsed: float = 0.0):
+        self.kind = kind
+        self.operation = operation
+        self.part_index = part_index
+        self.part_count = part_count
+        self.output_file = output_file
+        self.pages_copied = pages_copied
+        self.pages_total = pages_total
+        self.bytes_written = bytes_written
+        self.bytes_saved = bytes_saved
+        self.copy_seconds = copy_seconds
+        self.write_seconds = write_seconds
+        self.elapsed = elapsed
+    
+    def __repr__(self):
+        fields = ', '.join(f"{key}={value!r}" for key, value in vars(self).items()
+                           if value is not None)
+        return f"ProgressEvent({fields})"
+
+
+class ProgressBar:
+    """
+    Render ProgressEvents as a live, single-line progress bar.
+    
+    Pass an instance as the progress callback of a PDFSplitter:
+    
+        splitter = PDFSplitter("big.pdf", progress=ProgressBar(), quiet=True)
+    """
+    
+    def __init__(self, width: int = 30, stream=None, show_parts: bool = True):
+        """
+        Args:
+            width (int): Width of the bar in characters
+            stream: Where to draw the bar. Defaults to sys.stdout.
+            show_parts (bool): Print a line for every finished part
+        """
+        self.width = width
+        self.stream = stream or sys.stdout
+        self.show_parts = show_parts
+        self._pages_total = 0
+        self._part_pages: Dict[int, int] = {}
+        self._parts_done = 0
+        self._part_count = None
+        self._started = time.perf_counter()
+    
+    def __call__(self, event: ProgressEvent) -> None:
+        if event.kind == 'start':
+            self._pages_total = event.pages_total
+            self._part_count = event.part_count
+            self._part_pages = {}
+            self._parts_done = 0
+            self._started = time.perf_counter()
+        elif event.kind == 'page':
+            self._part_pages[event.part_index] = event.pages_copied
+        elif event.kind == 'part_end':
+            self._part_pages[event.part_index] = event.pages_total
+            self._parts_done += 1
+            if self.show_parts:
+                self._clear()
+                saved = f", saved {event.bytes_saved / 1024:.1f} KB" if event.bytes_saved else ""
+                self.stream.write(f"   📄 {event.output_file} ({event.pages_total} pages, "
+                                  f"{event.bytes_written / 1024:.1f} KB{saved})\n")
+        elif event.kind == 'finish':
+            self._draw()
+            self.stream.write("\n")
+            self.stream.flush()
+            return
+        
+        self._draw()
+    
+    def _clear(self) -> None:
+        self.stream.write("\r" + " " * (self.width + 60) + "\r")
+    
+    def _draw(self) -> None:
+        done = sum(self._part_pages.values())
+        total = max(self._pages_total, done, 1)
+        filled = int(self.width * done / total)
+        elapsed = time.perf_counter() - self._started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        parts = f"{self._parts_done}/{self._part_count}" if self._part_count else str(self._parts_done)
+        self.stream.write(f"\r   [{'█' * filled}{'░' * (self.width - filled)}] "
+                          f"{done * 100 // total:3d}%  {done}/{total} pages  "
+                          f"{rate:6.1f} pages/s  part {parts}")
+        self.stream.flush()
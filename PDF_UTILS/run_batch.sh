@@ -0,0 +1,24 @@
+#!/bin/bash
+# Launcher script for the Batch PDF Splitter
+# This script activates the virtual environment and passes all arguments to batch_splitter.py
+# Example: ./run_batch.sh incoming/ --out split/ --parts 4
+
+# Get the directory where this script is located
+SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
+PROJECT_ROOT="$( cd "$SCRIPT_DIR/.." && pwd )"
+
+# Activate virtual environment
+if [ -d "$PROJECT_ROOT/env" ]; then
+    source "$PROJECT_ROOT/env/bin/activate"
+else
+    echo "❌ Virtual environment not found at $PROJECT_ROOT/env"
+    exit 1
+fi
+
+# Run the batch splitter
+python "$SCRIPT_DIR/batch_splitter.py" "$@"
+STATUS=$?
+
+# Deactivate when done
+deactivate
+exit $STATUS
@@ -0,0 +1,146 @@
+"""
+Split Checkpoint Module
+Crash-safe part writes and an append-only record of the parts a split has finished
+"""
+
+import hashlib
+import json
+import os
+from typing import List, Tuple, Dict, Callable, BinaryIO
+
+
+def write_atomically(output_file: str, write: Callable[[BinaryIO], None]) -> int:
+    """
+    Write a file under a temporary name and rename it into place when complete.
+    
+    The rename is atomic, so output_file is either absent, its previous
+    version, or the complete new file - never a truncated one.
+    
+    Args:
+        output_file (str): Final path of the file
+        write (Callable[[BinaryIO], None]): Writes the content to the open file
+    
+    Returns:
+        int: Size of the written file in bytes
+    """
+    tmp_file = output_file + '.tmp'
+    try:
+        with open(tmp_file, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+            written = f.tell()
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    return written
+
+
+class SplitCheckpoint:
+    """
+    Records which parts of a split have been written, so a rerun can skip them.
+    
+    The checkpoint is a JSON-lines file next to the outputs. Its first line
+    identifies the job: the source file's path, size and modification time,
+    and a hash of the part layout (pages and output file of every part). Each
+    later line records one finished part and its size. Lines are appended and
+    fsynced as parts finish, so a crash loses at most the part in progress; a
+    half-written last line is ignored on load.
+    
+    A checkpoint only applies to the same source file split the same way; if
+    either changed, it is discarded and every part is written again.
+    
+    Attributes:
+        path (str): Path of the checkpoint file
+        completed (Dict[str, int]): Size in bytes of each finished part, by output file
+    """
+    
+    def __init__(self, path: str, pdf_path: str, operation: str,
+                 parts: List[Tuple[List[int], str]]):
+        """
+        Args:
+            path (str): Path of the checkpoint file
+            pdf_path (str): Source PDF of the split
+            operation (str): Name of the split method
+            parts (List[Tuple[List[int], str]]): (0-based page indices, output file) pairs
+        """
+        self.path = path
+        stat = os.stat(pdf_path)
+        layout = json.dumps([[list(page_indices), os.path.basename(output_file)]
+                             for page_indices, output_file in parts])
+        self.header = {
+            'source': os.path.abspath(pdf_path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'operation': operation,
+            'layout': hashlib.sha1(layout.encode()).hexdigest(),
+        }
+        self.completed: Dict[str, int] = {}
+    
+    @staticmethod
+    def path_for(output_dir: str, base_name: str, operation: str) -> str:
+        """Get the checkpoint path for a split of base_name written to output_dir"""
+        return os.path.join(output_dir, f".{base_name}.{operation}.checkpoint")
+    
+    def load(self) -> int:
+        """
+        Read the parts finished by an earlier run of the same job.
+        
+        A part only counts as finished if its file still exists with the
+        size recorded when it was written.
+        
+        Returns:
+            int: Number of finished parts found
+        """
+        self.completed = {}
+        if not os.path.exists(self.path):
+            return 0
+        
+        with open(self.path) as f:
+            lines = f.read().splitlines()
+        
+        try:
+            header = json.loads(lines[0]) if lines else None
+        except ValueError:
+            header = None
+        if header != self.header:
+            return 0
+        
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # last line cut off by a crash
+            output_file = entry['file']
+            if os.path.exists(output_file) and os.path.getsize(output_file) == entry['bytes']:
+                self.completed[output_file] = entry['bytes']
+        
+        return len(self.completed)
+    
+    def start(self) -> None:
+        """Begin a new checkpoint file, keeping the parts already found by load()"""
+        with open(self.path, 'w') as f:
+            f.write(json.dumps(self.header) + "\n")
+            for output_file, size in self.completed.items():
+                f.write(json.dumps({'file': output_file, 'bytes': size}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def is_done(self, output_file: str) -> bool:
+        """Check whether a part was finished by an earlier run"""
+        return output_file in self.completed
+    
+    def mark_done(self, output_file: str, size: int) -> None:
+        """Record a finished part"""
+        self.completed[output_file] = size
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({'file': output_file, 'bytes': size}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def remove(self) -> None:
+        """Delete the checkpoint once every part is written"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,208 @@
+"""
+Split Plan Module
+Collects several split operations so they can be validated together
+and executed in a single pass over the source PDF
+"""
+
+import os
+from typing import Optional, List, Tuple
+
+
+class SplitPlan:
+    """
+    A batch of split operations to run against one PDF.
+    
+    Operations are only recorded when added. Nothing is checked against the
+    document until the plan is resolved, at which point every operation is
+    validated before any output file is written.
+    
+    Outputs are named like the matching PDFSplitter method. When operations
+    left to default names would write the same file (two n-way splits, say),
+    each of those operations names its outputs {base_name}_op{N}... instead,
+    N being its 1-based position in the plan.
+    
+    Example:
+        plan = SplitPlan()
+        plan.add_split_into_n_parts(4)
+        plan.add_ranges([(1, 5), (3, 9)])
+        plan.add_extract([1, 3, 5], output_file="odd.pdf")
+        outputs = splitter.run_plan(plan, output_dir="out")
+    """
+    
+    def __init__(self):
+        self.operations = []
+    
+    def add_split_into_two(self, split_at_page: Optional[int] = None,
+                           prefix: Optional[str] = None) -> 'SplitPlan':
+        """
+        Add a two-way split, named like PDFSplitter.split_into_two.
+        
+        Args:
+            split_at_page (int, optional): Page number to split at (1-based index).
+                                          If None, splits at the middle.
+            prefix (str, optional): Name stem of the outputs, written as
+                                    {prefix}_part1.pdf and {prefix}_part2.pdf.
+                                    If None, the source file's base name is used.
+        
+        Returns:
+            SplitPlan: This plan, so calls can be chained
+        """
+        self.operations.append(('two', split_at_page, prefix))
+        return self
+    
+    def add_split_into_n_parts(self, n_parts: int,
+                               prefix: Optional[str] = None) -> 'SplitPlan':
+        """
+        Add an n-way split, named like PDFSplitter.split_into_n_parts.
+        
+        Args:
+            n_parts (int): Number of parts to split the PDF into
+            prefix (str, optional): Name stem of the outputs, written as
+                                    {prefix}_part1.pdf and so on. If None, the
+                                    source file's base name is used.
+        
+        Returns:
+            SplitPlan: This plan, so calls can be chained
+        """
+        self.operations.append(('n_parts', n_parts, prefix))
+        return self
+    
+    def add_ranges(self, page_ranges: List[Tuple[int, int]]) -> 'SplitPlan':
+        """
+        Add page ranges, named like PDFSplitter.split_by_ranges.
+        
+        Args:
+            page_ranges (List[Tuple[int, int]]): List of (start, end) page tuples (1-based, inclusive)
+        
+        Returns:
+            SplitPlan: This plan, so calls can be chained
+        """
+        self.operations.append(('ranges', list(page_ranges), None))
+        return self
+    
+    def add_extract(self, pages: List[int],
+                    output_file: Optional[str] = None) -> 'SplitPlan':
+        """
+        Add a page extraction, named like PDFSplitter.extract_pages.
+        
+        Args:
+            pages (List[int]): List of page numbers to extract (1-based)
+            output_file (str, optional): Output file path. If None, writes
+                                         {base_name}_extracted.pdf to the output directory.
+        
+        Returns:
+            SplitPlan: This plan, so calls can be chained
+        """
+        self.operations.append(('extract', (list(pages), output_file), None))
+        return self
+    
+    def resolve(self, total_pages: int, pdf_path: str,
+                output_dir: str) -> List[Tuple[List[int], str, str]]:
+        """
+        Validate every operation and expand the plan into its output files.
+        
+        Args:
+            total_pages (int): Number of pages in the source PDF
+            pdf_path (str): Path to the source PDF, used to name the outputs
+            output_dir (str): Directory the outputs are written to
+        
+        Returns:
+            List[Tuple[List[int], str, str]]: (0-based page indices, output file,
+                                               description) for every output
+        
+        Raises:
+            ValueError: If any operation is invalid or two outputs share a path
+        """
+        if not self.operations:
+            raise ValueError("Split plan is empty")
+        
+        base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        
+        # (0-based page indices, name, description) per operation. Names are
+        # suffixes appended to the operation's stem, except a caller-supplied
+        # output_file, which is kept as given
+        resolved = []
+        for kind, args, prefix in self.operations:
+            named = []
+            if kind == 'two':
+                split_at_page = args
+                if split_at_page is None:
+                    split_at_page = total_pages // 2
+                elif split_at_page < 1 or split_at_page >= total_pages:
+                    raise ValueError(f"split_at_page must be between 1 and {total_pages - 1}")
+                
+                named.append((list(range(split_at_page)), "_part1.pdf",
+                              f"Pages 1-{split_at_page}"))
+                named.append((list(range(split_at_page, total_pages)), "_part2.pdf",
+                              f"Pages {split_at_page + 1}-{total_pages}"))
+            
+            elif kind == 'n_parts':
+                n_parts = args
+                if n_parts < 2:
+                    raise ValueError("n_parts must be at least 2")
+                if n_parts > total_pages:
+                    raise ValueError(f"Cannot split {total_pages} pages into {n_parts} parts")
+                
+                pages_per_part = total_pages // n_parts
+                remainder = total_pages % n_parts
+                current_page = 0
+                for part_num in range(n_parts):
+                    pages_in_this_part = pages_per_part + (1 if part_num < remainder else 0)
+                    named.append((list(range(current_page, current_page + pages_in_this_part)),
+                                  f"_part{part_num + 1}.pdf",
+                                  f"Pages {current_page + 1}-{current_page + pages_in_this_part}"))
+                    current_page += pages_in_this_part
+            
+            elif kind == 'ranges':
+                for start, end in args:
+                    if start < 1 or end > total_pages or start > end:
+                        raise ValueError(f"Invalid page range: ({start}, {end})")
+                    named.append((list(range(start - 1, end)), f"_pages{start}-{end}.pdf",
+                                  f"Pages {start}-{end}"))
+            
+            elif kind == 'extract':
+                pages, output_file = args
+                if not pages:
+                    raise ValueError("No pages to extract")
+                for page in pages:
+                    if page < 1 or page > total_pages:
+                        raise ValueError(f"Invalid page number: {page}")
+                named.append(([page - 1 for page in pages], output_file or "_extracted.pdf",
+                              f"{len(pages)} extracted pages"))
+            
+            explicit = kind == 'extract' and args[1] is not None
+            resolved.append((kind, prefix, named, explicit))
+        
+        def paths_for(stems):
+            paths = []
+            for (kind, prefix, named, explicit), stem in zip(resolved, stems):
+                for page_indices, name, description in named:
+                    path = name if explicit else os.path.join(output_dir, stem + name)
+                    paths.append((page_indices, path, description))
+            return paths
+        
+        stems = [prefix or base_name for _, prefix, _, _ in resolved]
+        
+        # Operations on default names that collide with another output are
+        # renamed to {base_name}_op{N}; caller-chosen names are never changed
+        counts = {}
+        for _, output_file, _ in paths_for(stems):
+            key = os.path.abspath(output_file)
+            counts[key] = counts.get(key, 0) + 1
+        for op_index, (kind, prefix, named, explicit) in enumerate(resolved):
+            if prefix is not None or explicit:
+                continue
+            if any(counts[os.path.abspath(os.path.join(output_dir, stems[op_index] + name))] > 1
+                   for _, name, _ in named):
+                stems[op_index] = f"{base_name}_op{op_index + 1}"
+        
+        outputs = paths_for(stems)
+        
+        seen = set()
+        for _, output_file, _ in outputs:
+            key = os.path.abspath(output_file)
+            if key in seen:
+                raise ValueError(f"Split plan writes {output_file} more than once")
+            seen.add(key)
+        
+        return outputs
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+PDF Split Service
+A small asyncio HTTP server that keeps uploaded PDFs parsed and splits them on a process pool
+
+Usage:
+    python split_service.py --port 8765 --workers 4
+
+    curl --data-binary @big.pdf "http://127.0.0.1:8765/documents?name=big.pdf"
+    curl -d '{"mode": "parts", "n_parts": 4}' http://127.0.0.1:8765/documents/<id>/split -o parts.zip
+    curl -d '{"pages": [1, 3, 5]}' http://127.0.0.1:8765/documents/<id>/extract -o pages.pdf
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import unicodedata
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, List, Tuple, Dict
+from urllib.parse import urlsplit, parse_qs, quote
+
+try:
+    from .pdf_splitter import PDFSplitter
+    from .split_plan import SplitPlan
+except ImportError:
+    from pdf_splitter import PDFSplitter
+    from split_plan import SplitPlan
+
+
+MAX_UPLOAD_BYTES = 1024 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+_REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed', 411: 'Length Required',
+            413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+def _clean_name(name: Optional[str], fallback: str) -> str:
+    """Reduce an uploaded file name to its base name without control characters"""
+    name = os.path.basename((name or '').replace('\\', '/'))
+    name = ''.join(ch for ch in name if unicodedata.category(ch)[0] != 'C').strip()
+    return name if name not in ('', '.', '..') else fallback
+
+
+def _content_disposition(name: str, suffix: str) -> str:
+    """
+    Build an attachment Content-Disposition for {stem of name}{suffix}.
+    
+    Header values are sent as latin-1, so the filename parameter carries an
+    ASCII version of the name and filename* (RFC 5987) the exact UTF-8 one.
+    """
+    stem = os.path.splitext(name)[0]
+    ascii_stem = unicodedata.normalize('NFKD', stem).encode('ascii', 'ignore').decode()
+    ascii_stem = re.sub(r'[^A-Za-z0-9._-]+', '_', ascii_stem).strip('._') or 'document'
+    return (f'attachment; filename="{ascii_stem}{suffix}"; '
+            f"filename*=UTF-8''{quote(stem + suffix, safe='')}")
+
+
+# --- Worker process side -------------------------------------------------
+# Each worker keeps its own LRU cache of open splitters, so a document that
+# is used again is split without being parsed again. The service sends every
+# job for a document to the same worker, so it is parsed by one process only.
+
+_splitters: 'OrderedDict[str, PDFSplitter]' = OrderedDict()
+_cache_size = 8
+
+
+def _init_worker(cache_size: int) -> None:
+    global _cache_size
+    _cache_size = cache_size
+
+
+def _cached_splitter(doc_id: str, pdf_path: str) -> Tuple[PDFSplitter, bool]:
+    """Return the worker's splitter for a document, and whether it was already parsed"""
+    if doc_id in _splitters:
+        _splitters.move_to_end(doc_id)
+        return _splitters[doc_id], True
+    
+    while len(_splitters) >= _cache_size:
+        _, evicted = _splitters.popitem(last=False)
+        evicted.close()
+    
+    # mmap lets every worker share the file's pages through the OS page cache
+    splitter = PDFSplitter(pdf_path, use_mmap=True, quiet=True)
+    _splitters[doc_id] = splitter
+    return splitter, False
+
+
+def _page_count(doc_id: str, pdf_path: str) -> Tuple[int, bool]:
+    splitter, hit = _cached_splitter(doc_id, pdf_path)
+    return splitter.total_pages, hit
+
+
+def _render(doc_id: str, pdf_path: str, page_indices: List[int],
+            optimize: bool) -> Tuple[bytes, bool]:
+    splitter, hit = _cached_splitter(doc_id, pdf_path)
+    data, _ = splitter._render_part(page_indices, optimize)
+    return data, hit
+
+
+# --- HTTP side -------------------------------------------------------------
+
+class HTTPError(Exception):
+    """An error reported to the client with an HTTP status code"""
+    
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class _ChunkSink:
+    """Collects what zipfile writes so it can be sent on as HTTP chunks"""
+    
+    def __init__(self):
+        self.chunks = []
+    
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self) -> None:
+        pass
+    
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class SplitService:
+    """
+    An HTTP front end for PDFSplitter.
+    
+    Uploaded PDFs are stored under their SHA-256, which is also their document
+    id, so uploading the same file twice costs nothing. Splits run on a
+    fixed set of worker processes, each holding an LRU cache of parsed
+    documents. Every job for a document goes to the worker picked by its id,
+    so a document is parsed once, on upload or first use, and later requests
+    for it only copy pages. Different documents are split in parallel; the
+    parts of one split are rendered in turn by the document's worker. Split
+    parts are streamed back in a ZIP as they finish.
+    
+    Endpoints:
+        GET  /health                    Service status
+        POST /documents?name=x.pdf      Upload a PDF (raw request body)
+        GET  /documents/{id}            Page count and size of a document
+        POST /documents/{id}/split      {"mode": "two" | "parts" | "ranges", ...} -> ZIP
+        POST /documents/{id}/extract    {"pages": [1, 3, 5]} -> PDF
+    
+    Responses to page requests carry an X-Reader-Cache header ("hit" or
+    "miss") telling whether the document's worker had it parsed already when
+    the request arrived.
+    
+    Example:
+        service = SplitService(port=8765, workers=4)
+        asyncio.run(service.serve_forever())
+    """
+    
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, workers: int = 2,
+                 cache_size: int = 8, storage_dir: Optional[str] = None):
+        """
+        Args:
+            host (str): Address to listen on. Defaults to localhost only.
+            port (int): Port to listen on. 0 picks a free port.
+            workers (int): Number of worker processes for splitting
+            cache_size (int): Parsed documents kept by each worker
+            storage_dir (str, optional): Where uploads are kept. Defaults to a
+                                         new temporary directory.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if cache_size < 1:
+            raise ValueError("cache_size must be at least 1")
+        
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.cache_size = cache_size
+        self.storage_dir = storage_dir or tempfile.mkdtemp(prefix='pdf_split_service_')
+        os.makedirs(self.storage_dir, exist_ok=True)
+        self.documents: Dict[str, Dict] = {}
+        self._pools: List[ProcessPoolExecutor] = []
+        self._server = None
+    
+    async def start(self) -> None:
+        """Start the worker processes and begin accepting connections"""
+        # One single-process executor per worker, so jobs can be routed to
+        # the worker that already has a document parsed
+        self._pools = [ProcessPoolExecutor(max_workers=1, initializer=_init_worker,
+                                           initargs=(self.cache_size,))
+                       for _ in range(self.workers)]
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"🚀 PDF split service listening on http://{self.host}:{self.port}")
+    
+    async def stop(self) -> None:
+        """Stop accepting connections and shut the worker pool down"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for pool in self._pools:
+            pool.shutdown()
+        self._pools = []
+    
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+    
+    async def _run(self, doc_id: str, func, *args):
+        """Run a job for a document on the worker that owns the document"""
+        pool = self._pools[int(doc_id[:16], 16) % len(self._pools)]
+        return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+    
+    # --- Request handling ---
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                method, path, query, headers = await self._read_head(reader)
+                await self._dispatch(method, path, query, headers, reader, writer)
+            except HTTPError as e:
+                await self._send_json(writer, e.status, {'error': str(e)})
+            except (ValueError, KeyError, TypeError) as e:
+                await self._send_json(writer, 400, {'error': str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            try:
+                await self._send_json(writer, 500, {'error': str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+    
+    async def _read_head(self, reader: asyncio.StreamReader):
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        if not request_line:
+            raise ConnectionError("Empty request")
+        method, target, _ = request_line.split(' ', 2)
+        
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        
+        url = urlsplit(target)
+        return method.upper(), url.path.rstrip('/') or '/', parse_qs(url.query), headers
+    
+    async def _dispatch(self, method, path, query, headers, reader, writer) -> None:
+        if path == '/health':
+            return await self._send_json(writer, 200, {
+                'status': 'ok', 'documents': len(self.documents), 'workers': self.workers})
+        
+        if path == '/documents':
+            self._require(method, 'POST')
+            name = query.get('name', [None])[0]
+            return await self._upload(headers, reader, writer, name)
+        
+        match = re.fullmatch(r'/documents/([0-9a-f]{64})(/split|/extract)?', path)
+        if not match:
+            raise HTTPError(404, f"No such endpoint: {path}")
+        
+        doc_id, action = match.groups()
+        doc = self._document(doc_id)
+        if action is None:
+            self._require(method, 'GET')
+            return await self._send_json(writer, 200, doc)
+        
+        self._require(method, 'POST')
+        body = await self._read_json(headers, reader)
+        if action == '/split':
+            await self._split(doc, body, writer)
+        else:
+            await self._extract(doc, body, writer)
+    
+    @staticmethod
+    def _require(method: str, allowed: str) -> None:
+        if method != allowed:
+            raise HTTPError(405, f"Use {allowed} for this endpoint")
+    
+    def _document(self, doc_id: str) -> Dict:
+        if doc_id not in self.documents:
+            pdf_path = os.path.join(self.storage_dir, f"{doc_id}.pdf")
+            if not os.path.exists(pdf_path):
+                raise HTTPError(404, f"Unknown document: {doc_id}")
+            # Stored by an earlier run of the service
+            self.documents[doc_id] = {'id': doc_id, 'name': f"{doc_id}.pdf", 'pages': None,
+                                      'size': os.path.getsize(pdf_path)}
+        return self.documents[doc_id]
+    
+    async def _upload(self, headers, reader, writer, name: Optional[str]) -> None:
+        if 'content-length' not in headers:
+            raise HTTPError(411, "Content-Length is required")
+        remaining = int(headers['content-length'])
+        if remaining > MAX_UPLOAD_BYTES:
+            raise HTTPError(413, f"Uploads are limited to {MAX_UPLOAD_BYTES} bytes")
+        
+        # Stream the body to disk, hashing it on the way
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.storage_dir, suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while remaining:
+                    chunk = await reader.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise HTTPError(400, "Upload ended early")
+                    digest.update(chunk)
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            
+            doc_id = digest.hexdigest()
+            pdf_path = os.path.join(self.storage_dir, f"{doc_id}.pdf")
+            os.replace(tmp_path, pdf_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
+        try:
+            pages, hit = await self._run(doc_id, _page_count, doc_id, pdf_path)
+        except Exception as e:
+            os.remove(pdf_path)
+            raise HTTPError(400, str(e))
+        
+        doc = {'id': doc_id, 'name': _clean_name(name, f"{doc_id}.pdf"),
+               'pages': pages, 'size': os.path.getsize(pdf_path)}
+        self.documents[doc_id] = doc
+        await self._send_json(writer, 201, doc, {'X-Reader-Cache': 'hit' if hit else 'miss'})
+    
+    async def _read_json(self, headers, reader) -> Dict:
+        length = int(headers.get('content-length', 0))
+        if not length:
+            return {}
+        if length > CHUNK_SIZE:
+            raise HTTPError(413, "Request body is too large")
+        body = json.loads(await reader.readexactly(length))
+        if not isinstance(body, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return body
+    
+    async def _page_total(self, doc: Dict) -> bool:
+        """Fill in the page count of a document and return whether its reader was cached"""
+        pages, hit = await self._run(doc['id'], _page_count, doc['id'], self._path(doc))
+        doc['pages'] = pages
+        return hit
+    
+    def _path(self, doc: Dict) -> str:
+        return os.path.join(self.storage_dir, f"{doc['id']}.pdf")
+    
+    async def _split(self, doc: Dict, body: Dict, writer: asyncio.StreamWriter) -> None:
+        mode = body.get('mode')
+        plan = SplitPlan()
+        if mode == 'two':
+            plan.add_split_into_two(body.get('split_at_page'))
+        elif mode == 'parts':
+            plan.add_split_into_n_parts(int(body['n_parts']))
+        elif mode == 'ranges':
+            plan.add_ranges([tuple(r) for r in body['ranges']])
+        else:
+            raise HTTPError(400, "mode must be 'two', 'parts' or 'ranges'")
+        
+        hit = await self._page_total(doc)
+        outputs = plan.resolve(doc['pages'], doc['name'], '')
+        optimize = bool(body.get('optimize', False))
+        
+        # Queue every part on the document's worker, then stream them in order as
+        # they finish. The page count above ran on that worker first, so hit
+        # also tells whether these renders have to parse the document
+        jobs = [asyncio.ensure_future(self._run(doc['id'], _render, doc['id'], self._path(doc),
+                                                page_indices, optimize))
+                for page_indices, _, _ in outputs]
+        try:
+            await self._send_head(writer, 200, 'application/zip', {
+                'Content-Disposition': _content_disposition(doc['name'], '_split.zip'),
+                'Transfer-Encoding': 'chunked',
+                'X-Reader-Cache': 'hit' if hit else 'miss',
+            })
+            sink = _ChunkSink()
+            with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as archive:
+                for (_, name, _), job in zip(outputs, jobs):
+                    data, _ = await job
+                    archive.writestr(name, data)
+                    await self._send_chunk(writer, sink.drain())
+            await self._send_chunk(writer, sink.drain())
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            for job in jobs:
+                job.cancel()
+    
+    async def _extract(self, doc: Dict, body: Dict, writer: asyncio.StreamWriter) -> None:
+        pages = body.get('pages')
+        if not isinstance(pages, list) or not pages:
+            raise HTTPError(400, "pages must be a non-empty list of page numbers")
+        
+        hit = await self._page_total(doc)
+        for page in pages:
+            if not isinstance(page, int) or page < 1 or page > doc['pages']:
+                raise HTTPError(400, f"Invalid page number: {page}")
+        
+        data, render_hit = await self._run(doc['id'], _render, doc['id'], self._path(doc),
+                                           [page - 1 for page in pages], bool(body.get('optimize', False)))
+        hit = hit and render_hit
+        await self._send_head(writer, 200, 'application/pdf', {
+            'Content-Length': str(len(data)),
+            'Content-Disposition': _content_disposition(doc['name'], '_extracted.pdf'),
+            'X-Reader-Cache': 'hit' if hit else 'miss',
+        })
+        writer.write(data)
+        await writer.drain()
+    
+    # --- Response helpers ---
+    
+    async def _send_head(self, writer, status: int, content_type: str,
+                         headers: Optional[Dict[str, str]] = None) -> None:
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+                 f"Content-Type: {content_type}", "Connection: close"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+        await writer.drain()
+    
+    async def _send_chunk(self, writer, data: bytes) -> None:
+        # An empty chunk would end the response, so only send data
+        if data:
+            writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            await writer.drain()
+    
+    async def _send_json(self, writer, status: int, payload: Dict,
+                         headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode()
+        await self._send_head(writer, status, 'application/json',
+                              dict(headers or {}, **{'Content-Length': str(len(data))}))
+        writer.write(data)
+        await writer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP service for splitting PDFs")
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='port to listen on (default: 8765)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--cache-size', type=int, default=8,
+                        help='parsed documents cached per worker (default: 8)')
+    parser.add_argument('--storage', help='directory for uploaded PDFs (default: a temp directory)')
+    args = parser.parse_args()
+    
+    service = SplitService(args.host, args.port, args.workers, args.cache_size, args.storage)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        print("\n👋 Service stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
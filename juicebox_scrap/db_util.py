@@ -1,28 +1,118 @@
-import pymongo
-import bson
-from datetime import datetime, timedelta, date
-from pytz import timezone
-import pytz
-mdb_client = pymongo.MongoClient("mongodb://localhost:27017/")
-database_name = 'juice'
+import atexit
+import time
+from datetime import datetime
+from storage import open_store, MongoStore
+from metrics import metrics
+
+# The configured store (see storage.open_store), opened on first use, so
+# importing this module doesn't connect anywhere
+store = None
+
+def get_store():
+    global store
+    if store is None:
+        store = open_store()
+    return store
+
+def set_store(new_store):
+    global store
+    store = new_store
+    return store
 
 def setter_juice(setter_dict={}):
-    database = mdb_client[database_name]
-    cursor_object = database['comments']
     if bool(setter_dict):
-        return_obj = cursor_object.insert_one(setter_dict)
-        return return_obj.inserted_id
+        return len(get_store().upsert_rows([setter_dict]))
     else:
         return 0
 
 def getter_juice(finder_dict = {}, projection_dict = {}):
-    database = mdb_client[database_name]
-    cursor_object = database['comments']
-    projection_dict['_id'] = False
-    cursor_result = cursor_object.find(finder_dict, projection = projection_dict)
-    return list(cursor_result)
+    fields = [field for field, wanted in projection_dict.items() if wanted and field != '_id'] or None
+    if isinstance(get_store(), MongoStore):
+        batches = get_store().iter_rows(fields, query=finder_dict)
+        return [row for batch in batches for row in batch]
+    # Other stores only filter on plain field equality
+    rows = [row for batch in get_store().iter_rows() for row in batch
+            if all(row.get(field) == value for field, value in finder_dict.items())]
+    if fields:
+        rows = [{field: row[field] for field in fields if field in row} for row in rows]
+    return rows
+
+def iter_juice(finder_dict = {}, projection_dict = None, batch_size = 1000):
+    # Yields the stored rows in lists of batch_size, reading them one batch at
+    # a time instead of materializing them like getter_juice
+    if finder_dict:
+        rows = getter_juice(finder_dict, dict(projection_dict or {}))
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start+batch_size]
+        return
+    fields = [field for field, wanted in (projection_dict or {}).items() if wanted and field != '_id'] or None
+    yield from get_store().iter_rows(fields, batch_size=batch_size)
 
 def del_comments_all():
-    database = mdb_client[database_name]
-    cursor_object = database['comments']
-    cursor_object.drop()
\ No newline at end of file
+    get_store().drop()
+    if isinstance(get_store(), MongoStore):
+        # The stats summary describes the rows just dropped
+        import stats
+        stats.summary_collection().drop()
+
+def known_links(links):
+    # The subset of links that are already stored
+    return get_store().known_links(links)
+
+def load_scrape_state(name):
+    return get_store().load_state(name)
+
+def save_scrape_state(name, state):
+    get_store().save_state(name, dict(state, updated_at=datetime.utcnow()))
+
+
+class JuiceWriter:
+    # Buffers scraped rows and writes them to the store in one batch per
+    # flush (one unordered bulk upsert for Mongo) instead of one insert_one
+    # round trip per row. Rows are keyed on their link, so scraping the same
+    # payments again doesn't duplicate them.
+    # A flush happens every max_rows rows, when max_seconds have passed since
+    # the last flush (checked as rows are added), and on close() / exit.
+    # on_flush, if given, is called after every flush with the rows that were
+    # new to the collection (not the ones updated in place).
+
+    def __init__(self, max_rows=500, max_seconds=5.0, store=None, on_flush=None):
+        self.on_flush = on_flush
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.store = store or get_store()
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.written = 0
+        atexit.register(self.close)
+
+    def add(self, row):
+        if not row:
+            return
+        self.buffer.append(row)
+        if len(self.buffer) >= self.max_rows or time.monotonic() - self.last_flush >= self.max_seconds:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.buffer:
+            return 0
+        rows, self.buffer = self.buffer, []
+        with metrics.timed('db_write'):
+            new_rows = self.store.upsert_rows(rows)
+        metrics.count('rows_written', len(rows))
+        metrics.count('rows_new', len(new_rows))
+        self.written += len(rows)
+        if self.on_flush is not None:
+            self.on_flush(new_rows)
+        return len(new_rows)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
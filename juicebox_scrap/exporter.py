@@ -1,25 +1,103 @@
 
+import argparse
+import os
 import pandas as pd
 import numpy as np
-from db_util import getter_juice
+from db_util import iter_juice, set_store
+from storage import open_store, STORE_ENV
 
-def juice_comments():
-    all_data = getter_juice()
-    df = pd.DataFrame(all_data)
-    df['amount'] = df['amount'].str.replace('Ξ', '')
-    # print(df.head())
-    df.to_excel('juice_comments_22DEC.xlsx', index=False)
+COLUMNS = ['comment', 'amount', 'link']
+
+def parse_amounts(amounts):
+    # 'Ξ1,234.5' -> 1234.5; anything unparseable becomes NaN
+    amounts = amounts.astype('string').str.replace('Ξ', '', regex=False).str.replace(',', '', regex=False)
+    return pd.to_numeric(amounts.str.strip(), errors='coerce').astype('float64')
+
+def iter_comment_frames(chunk_rows=5000):
+    # One DataFrame of at most chunk_rows rows per cursor batch, only the
+    # exported fields fetched, amount already numeric
+    projection = {column: True for column in COLUMNS}
+    for batch in iter_juice(projection_dict=projection, batch_size=chunk_rows):
+        df = pd.DataFrame(batch, columns=COLUMNS)
+        df['comment'] = df['comment'].astype('string')
+        df['link'] = df['link'].astype('string')
+        df['amount'] = parse_amounts(df['amount'])
+        yield df
+
+def export_csv(path, frames):
+    rows = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        f.write(','.join(COLUMNS) + '\n')
+        for df in frames:
+            df.to_csv(f, header=False, index=False)
+            rows += len(df)
+    return rows
+
+def export_parquet(path, frames):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError('Parquet export needs pyarrow: pip install pyarrow')
+    schema = pa.schema([('comment', pa.string()), ('amount', pa.float64()), ('link', pa.string())])
+    rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for df in frames:
+            # One row group per chunk
+            writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+            rows += len(df)
+    return rows
 
+def export_xlsx(path, frames):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ImportError('XLSX export needs openpyxl: pip install openpyxl')
+    # Write-only workbooks stream rows to disk instead of keeping every cell
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(COLUMNS)
+    rows = 0
+    for df in frames:
+        df = df.astype(object).where(df.notna(), None)
+        for row in df.itertuples(index=False, name=None):
+            sheet.append(row)
+        rows += len(df)
+    workbook.save(path)
+    return rows
 
-juice_comments()
+EXPORTERS = {'.csv': export_csv, '.parquet': export_parquet, '.xlsx': export_xlsx}
+
+def export_comments(path, chunk_rows=5000):
+    # Streams the comments collection into a CSV, Parquet or XLSX file (picked
+    # by extension) chunk by chunk, so memory use doesn't grow with the
+    # collection. Returns the number of rows written.
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXPORTERS:
+        raise ValueError(f'Unsupported export format {extension!r}, use one of {", ".join(EXPORTERS)}')
+    return EXPORTERS[extension](path, iter_comment_frames(chunk_rows))
+
+def juice_comments():
+    return export_comments('juice_comments_22DEC.xlsx')
 
 def read_save_csv():
     df = pd.read_csv('juice_comments_2.csv')
     # df.to_csv('juice_comments_3.csv', index=False)
     print(df.head())
 
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export the scraped Juicebox comments')
+    parser.add_argument('output', nargs='?', default='juice_comments_22DEC.xlsx', help='.csv, .parquet or .xlsx file')
+    parser.add_argument('--chunk-rows', type=int, default=5000)
+    parser.add_argument('--store', help=f'mongodb://, sqlite:/// or parquet:/// URL (default: ${STORE_ENV} or the local mongod)')
+    args = parser.parse_args()
+    if args.store:
+        set_store(open_store(args.store))
+    rows = export_comments(args.output, chunk_rows=args.chunk_rows)
+    print(f'Exported {rows} rows to {args.output}')
+
 # read_save_csv()
 # Order #622566449287399
 # Placed on 16 Dec 2021 11:14:50
 # Never ever Recommended
-# দুই প্যাকেট এসিআই সুরক্ষা জৈব সার অর্ডার করেছিলাম, এক প্যাকেট জৈব সার আর এক প্যাকেট রেডিমিক্স সয়েল পাঠায়ে দিছে। কাছাকাছি নামে শপ () ও একই প্রোডাক্টের(রিভিউ খারাপ থাকলে) নতুন পোস্ট এই শপের সততার বিষয়ে সন্দেহের উদ্রেকও করে।   
\ No newline at end of file
+# দুই প্যাকেট এসিআই সুরক্ষা জৈব সার অর্ডার করেছিলাম, এক প্যাকেট জৈব সার আর এক প্যাকেট রেডিমিক্স সয়েল পাঠায়ে দিছে। কাছাকাছি নামে শপ () ও একই প্রোডাক্টের(রিভিউ খারাপ থাকলে) নতুন পোস্ট এই শপের সততার বিষয়ে সন্দেহের উদ্রেকও করে।
\ No newline at end of file
@@ -0,0 +1,250 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, ROUND_HALF_UP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import metrics
+
+# The payments juicebox.money lists come from the Juicebox subgraph; reading
+# it directly gives the same comment / amount / link records as the browser
+# without running one
+SUBGRAPH_URL = os.environ.get('JUICE_SUBGRAPH_URL', 'https://api.thegraph.com/subgraphs/name/jbx-protocol/juicebox')
+PROJECT_ID = '1-36'  # ConstitutionDAO, Juicebox v1 project 36
+ETHERSCAN_TX = 'https://etherscan.io/tx/'
+
+# The site shows amounts with formatWad: at most 4 decimals, trailing zeros
+# dropped, thousands separated by commas
+AMOUNT_PRECISION = 4
+
+# The subgraph rejects skip values above 5000, so the events are read in
+# windows: ordered by id, each window starts after the last id of the
+# previous one and its pages (skip 0, page_size, ...) are fetched concurrently
+MAX_SKIP = 5000
+
+FIXTURE_EVENTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pay_events.json')
+
+PAY_EVENTS_QUERY = """
+query PayEvents($project: String!, $lastId: String!, $first: Int!, $skip: Int!) {
+  payEvents(where: {project: $project, id_gt: $lastId}, orderBy: id, orderDirection: asc,
+            first: $first, skip: $skip) {
+    id
+    amount
+    note
+    txHash
+    timestamp
+  }
+}
+"""
+
+
+class SessionTransport:
+    # POSTs GraphQL requests over one pooled requests.Session, retrying
+    # connection errors and 429/5xx responses with backoff. Any object with
+    # the same post_json(url, payload) method can be used instead.
+
+    def __init__(self, pool_size=8, retries=3, timeout=30):
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=None)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def post_json(self, url, payload):
+        response = self.session.post(url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        self.session.close()
+
+
+def format_amount(wei):
+    # '1234560000000000000000' -> 'Ξ1,234.56', as the site displays it
+    eth = (Decimal(wei) / Decimal(10) ** 18).quantize(Decimal(1).scaleb(-AMOUNT_PRECISION), ROUND_HALF_UP)
+    text = f'{eth:,.{AMOUNT_PRECISION}f}'.rstrip('0').rstrip('.') or '0'
+    return f'Ξ{text}'
+
+def to_record(event):
+    # A pay event as the scraper would have read it off the page
+    record = {'amount': format_amount(event['amount']), 'link': ETHERSCAN_TX + event['txHash']}
+    note = (event.get('note') or '').strip()
+    if note:
+        record['comment'] = note
+    return record
+
+def fetch_page(transport, url, project, last_id, first, skip):
+    payload = {'query': PAY_EVENTS_QUERY,
+               'variables': {'project': project, 'lastId': last_id, 'first': first, 'skip': skip}}
+    with metrics.timed('fetch_page'):
+        result = transport.post_json(url, payload)
+    if result.get('errors'):
+        raise RuntimeError(f'Subgraph error: {result["errors"]}')
+    events = result['data']['payEvents']
+    metrics.count('pages')
+    return events
+
+def fetch_events(project=PROJECT_ID, url=SUBGRAPH_URL, page_size=1000, workers=4, max_skip=MAX_SKIP,
+                 transport=None):
+    # Every pay event of the project, newest first. Pages are fetched
+    # workers at a time; a short page ends the walk.
+    own_transport = transport is None
+    transport = transport or SessionTransport(pool_size=workers)
+    skips = list(range(0, max_skip + 1, page_size))
+    events = []
+    last_id = ''
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            finished = False
+            while not finished:
+                window = []
+                for start in range(0, len(skips), workers):
+                    wave = skips[start:start+workers]
+                    pages = list(pool.map(lambda skip: fetch_page(transport, url, project, last_id, page_size, skip), wave))
+                    for page in pages:
+                        window.extend(page)
+                        if len(page) < page_size:
+                            finished = True
+                            break
+                    if finished:
+                        break
+                events.extend(window)
+                if window:
+                    last_id = window[-1]['id']
+                else:
+                    finished = True
+    finally:
+        if own_transport:
+            transport.close()
+    # The site lists the newest payment first
+    events.sort(key=lambda event: (-int(event['timestamp']), event['id']))
+    return events
+
+def fetch_payments(project=PROJECT_ID, url=SUBGRAPH_URL, page_size=1000, workers=4, max_skip=MAX_SKIP,
+                   transport=None):
+    # The payments as comment / amount / link records, in the site's order,
+    # one per transaction
+    records = []
+    seen = set()
+    for event in fetch_events(project, url, page_size, workers, max_skip, transport):
+        record = to_record(event)
+        if record['link'] in seen:
+            continue
+        seen.add(record['link'])
+        records.append(record)
+    metrics.count('rows', len(records))
+    return records
+
+
+class FixtureServer:
+    # A local stand-in for the subgraph serving recorded pay events (a JSON
+    # list, as written by --record) with the same filtering and paging as
+    # PAY_EVENTS_QUERY: project, id_gt, orderBy id, first and skip
+
+    def __init__(self, events_path=FIXTURE_EVENTS, host='127.0.0.1', port=0):
+        with open(events_path) as f:
+            self.events = sorted(json.load(f), key=lambda event: event['id'])
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                variables = payload['variables']
+                matching = [event for event in server.events
+                            if event['project'] == variables['project'] and event['id'] > variables['lastId']]
+                page = matching[variables['skip']:variables['skip'] + variables['first']]
+                fields = ('id', 'amount', 'note', 'txHash', 'timestamp')
+                body = json.dumps({'data': {'payEvents': [{key: event[key] for key in fields} for event in page]}})
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body.encode())))
+                self.end_headers()
+                self.wfile.write(body.encode())
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.url = f'http://{host}:{self.httpd.server_address[1]}/'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        return False
+
+
+def check_fixture(browser=False):
+    # Fetches fixtures/pay_events.json through the local fixture server with
+    # small pages and windows, so every code path runs, and compares the
+    # records with a single-connection fetch and, with browser, with what the
+    # Selenium scraper reads from fixtures/payments.html (the same payments)
+    with FixtureServer() as server:
+        start = time.perf_counter()
+        concurrent = fetch_payments(url=server.url, page_size=20, workers=4, max_skip=100)
+        seconds = time.perf_counter() - start
+        serial = fetch_payments(url=server.url, page_size=20, workers=1, max_skip=100)
+    print(f'Fetched {len(concurrent)} payments in {seconds:.2f}s')
+    ok = concurrent == serial and len(concurrent) == len(server.events)
+    if browser:
+        from scrap_util import driver_return, scrape_slice
+        from scrape_pool import fixture_url, quit_driver
+        driver = driver_return(url=fixture_url(rows=len(server.events)))
+        try:
+            scraped = scrape_slice(driver, 1, len(server.events) + 50)
+        finally:
+            quit_driver(driver)
+        ok = ok and scraped == concurrent
+    print('Fetched records match' if ok else 'Fetched records differ')
+    return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fetch the Juicebox payments without a browser')
+    parser.add_argument('--project', default=PROJECT_ID)
+    parser.add_argument('--url', default=SUBGRAPH_URL, help='subgraph endpoint (default: $JUICE_SUBGRAPH_URL)')
+    parser.add_argument('--workers', type=int, default=4, help='concurrent page fetches')
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--record', help='save the raw pay events to this JSON file instead of storing records')
+    parser.add_argument('--fixture', action='store_true', help='check against the local recorded-fixture server')
+    parser.add_argument('--browser', action='store_true', help='with --fixture, also compare with the Selenium scraper')
+    parser.add_argument('--store', help='mongodb://, sqlite:/// or parquet:/// URL (default: $JUICE_STORE or the local mongod)')
+    args = parser.parse_args()
+
+    if args.fixture:
+        raise SystemExit(0 if check_fixture(browser=args.browser) else 1)
+
+    if args.record:
+        events = fetch_events(args.project, args.url, args.page_size, args.workers)
+        for event in events:
+            event['project'] = args.project
+        with open(args.record, 'w') as f:
+            json.dump(events, f, indent=1, ensure_ascii=False)
+        print(f'Recorded {len(events)} pay events to {args.record}')
+        raise SystemExit(0)
+
+    # Not scrap_util.get_writer: that module needs selenium
+    from db_util import JuiceWriter, get_store, set_store
+    from stats import update_summary
+    from storage import MongoStore, open_store
+    if args.store:
+        set_store(open_store(args.store))
+    writer = JuiceWriter(on_flush=update_summary if isinstance(get_store(), MongoStore) else None)
+    for record in fetch_payments(args.project, args.url, args.page_size, args.workers):
+        writer.add(record)
+    writer.close()
+    print(f'Saved {writer.written} rows')
+    print(metrics.summary())
@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Stages timed during a scrape
+#   page_load   waiting for the payments list to show rows (first load and after every "load more")
+#   extract     the script call that reads a page of rows
+#   db_write    one flush of buffered rows to the store
+# Counters
+#   pages, rows, load_more_clicks, rows_without_comment,
+#   lookup_failures (rows whose amount or link could not be found), rows_written, rows_new
+
+SAMPLES_KEPT = 2048
+
+
+class Latency:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # The most recent samples, for the quantiles
+        self.samples = deque(maxlen=SAMPLES_KEPT)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def quantile(self, q):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'total_s': round(self.total, 6),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else None,
+            'p50_ms': round(self.quantile(0.5) * 1000, 3) if self.count else None,
+            'p95_ms': round(self.quantile(0.95) * 1000, 3) if self.count else None,
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+class ScrapeMetrics:
+    # Thread-safe counters and latencies of one scrape, exported as JSON or
+    # Prometheus text, optionally written to a file every few seconds
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+        self.reporter = None
+        self.stop_event = threading.Event()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.monotonic()
+            self.counters = {}
+            self.latencies = {}
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            self.latencies.setdefault(stage, Latency()).add(seconds)
+
+    @contextmanager
+    def timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self.lock:
+            elapsed = time.monotonic() - self.started
+            rows = self.counters.get('rows', 0)
+            return {
+                'elapsed_s': round(elapsed, 3),
+                'rows_per_s': round(rows / elapsed, 3) if elapsed > 0 else None,
+                'counters': dict(self.counters),
+                'latency': {stage: latency.snapshot() for stage, latency in self.latencies.items()},
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        lines = [
+            '# HELP juice_scrape_elapsed_seconds Time since the scrape started',
+            '# TYPE juice_scrape_elapsed_seconds gauge',
+            f'juice_scrape_elapsed_seconds {snapshot["elapsed_s"]}',
+            '# HELP juice_scrape_rows_per_second Rows read per second since the scrape started',
+            '# TYPE juice_scrape_rows_per_second gauge',
+            f'juice_scrape_rows_per_second {snapshot["rows_per_s"] or 0}',
+        ]
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f'# TYPE juice_scrape_{name}_total counter')
+            lines.append(f'juice_scrape_{name}_total {value}')
+        lines.append('# HELP juice_scrape_seconds Duration of each scrape stage')
+        lines.append('# TYPE juice_scrape_seconds summary')
+        with self.lock:
+            for stage, latency in sorted(self.latencies.items()):
+                for q in (0.5, 0.95):
+                    lines.append(f'juice_scrape_seconds{{stage="{stage}",quantile="{q}"}} {latency.quantile(q)}')
+                lines.append(f'juice_scrape_seconds_sum{{stage="{stage}"}} {latency.total}')
+                lines.append(f'juice_scrape_seconds_count{{stage="{stage}"}} {latency.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path, fmt='json'):
+        # Replaces the file in one step so a reader never sees half a snapshot
+        text = self.to_prometheus() if fmt == 'prometheus' else self.to_json()
+        with open(path + '.tmp', 'w') as f:
+            f.write(text)
+        os.replace(path + '.tmp', path)
+
+    def start_reporter(self, path, fmt='json', interval=10.0):
+        # Writes a snapshot to path every interval seconds until stop_reporter()
+        self.stop_reporter()
+        self.stop_event = threading.Event()
+
+        def report():
+            while not self.stop_event.wait(interval):
+                self.write(path, fmt)
+
+        self.reporter = threading.Thread(target=report, name='scrape-metrics', daemon=True)
+        self.reporter.start()
+
+    def stop_reporter(self, path=None, fmt='json'):
+        if self.reporter is not None:
+            self.stop_event.set()
+            self.reporter.join()
+            self.reporter = None
+        if path:
+            self.write(path, fmt)
+
+    def summary(self):
+        snapshot = self.snapshot()
+        counters = snapshot['counters']
+        lines = [
+            f'Scraped {counters.get("rows", 0)} rows in {counters.get("pages", 0)} pages '
+            f'in {snapshot["elapsed_s"]:.1f}s ({snapshot["rows_per_s"] or 0:.1f} rows/s)',
+            f'Rows without comment: {counters.get("rows_without_comment", 0)}, '
+            f'lookup failures: {counters.get("lookup_failures", 0)}, '
+            f'written: {counters.get("rows_written", 0)} ({counters.get("rows_new", 0)} new)',
+        ]
+        for stage, latency in sorted(snapshot['latency'].items()):
+            lines.append(f'{stage:>10}: {latency["count"]} x, mean {latency["mean_ms"]} ms, '
+                         f'p95 {latency["p95_ms"]} ms, max {latency["max_ms"]} ms, total {latency["total_s"]:.2f}s')
+        return '\n'.join(lines)
+
+
+# Shared by the scraper, the pool and the writer
+metrics = ScrapeMetrics()
@@ -4,6 +4,8 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver import ActionChains
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
 
 import requests
 # import urllib3
@@ -15,12 +17,92 @@ import time
 import glob
 import json
 import os
+import argparse
+
+from db_util import JuiceWriter, get_store, set_store, known_links, load_scrape_state, save_scrape_state
+from stats import update_summary
+from storage import MongoStore, open_store, STORE_ENV
+from metrics import metrics
 
 
 DRIVER_PATH = '/home/webguy/chromedriver/96/chromedriver'
 BASE_URL = 'https://juicebox.money/#/p/constitutiondao'
 BASE_FOLDER = '/media/webguy/ubstrg/permitted_storage/VSCODE_GIT/python-scripts/juicebox_scrap/Downloads/'
 
+# The payments list; every child div is one payment, the one after the last
+# payment is the "load more" button
+LIST_XPATH = '//*[@id="root"]/section/main/div/div[1]/div[3]/div[2]/div/div[2]'
+
+# Reads rows start..end (1-based, inclusive) of the payments list in the page
+# itself and returns them, with the number of rows that had no amount or
+# link, in one WebDriver round trip. Paths are relative to a
+# row: comment div[2]/span/span (missing when the payer left none), amount
+# div[1]/div[1]/div[2], etherscan link div[1]/div[2]/div[1]/a.
+EXTRACT_ROWS_JS = """
+var first = arguments[0], last = arguments[1], listXpath = arguments[2];
+var found = function (xpath, context) {
+    return document.evaluate(xpath, context, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+};
+var list = found(listXpath, document);
+if (!list) { return {rows: [], skipped: 0}; }
+var divs = [];
+for (var child = list.firstElementChild; child; child = child.nextElementSibling) {
+    if (child.tagName === 'DIV') { divs.push(child); }
+}
+var rows = [], skipped = 0;
+for (var i = first; i <= Math.min(last, divs.length); i++) {
+    var amount = found('./div[1]/div[1]/div[2]', divs[i - 1]);
+    var link = found('./div[1]/div[2]/div[1]/a', divs[i - 1]);
+    if (!amount || !link) { skipped += 1; continue; }
+    var row = {amount: amount.innerText, link: link.href};
+    var comment = found('./div[2]/span/span', divs[i - 1]);
+    if (comment) { row.comment = comment.innerText; }
+    rows.push(row);
+}
+return {rows: rows, skipped: skipped};
+"""
+
+# Counts the payments in the list and tells whether a "load more" element
+# follows them. A payment is a child div with an amount and a link, at the
+# same paths EXTRACT_ROWS_JS reads.
+LIST_STATE_JS = """
+var found = function (xpath, context) {
+    return document.evaluate(xpath, context, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+};
+var list = found(arguments[0], document);
+var state = {rows: 0, more: false};
+if (!list) { return state; }
+for (var child = list.firstElementChild; child; child = child.nextElementSibling) {
+    if (child.tagName !== 'DIV') { continue; }
+    if (found('./div[1]/div[1]/div[2]', child) && found('./div[1]/div[2]/div[1]/a', child)) {
+        state.rows += 1;
+        state.more = false;
+    } else if (state.rows > 0) {
+        state.more = true;
+    }
+}
+return state;
+"""
+
+# The 1-based position of the loaded payment whose etherscan link is
+# arguments[0], 0 when no loaded row has it
+FIND_ROW_JS = """
+var link = arguments[0];
+var found = function (xpath, context) {
+    return document.evaluate(xpath, context, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+};
+var list = found(arguments[1], document);
+if (!list) { return 0; }
+var position = 0;
+for (var child = list.firstElementChild; child; child = child.nextElementSibling) {
+    if (child.tagName !== 'DIV') { continue; }
+    position += 1;
+    var a = found('./div[1]/div[2]/div[1]/a', child);
+    if (a && a.href === link) { return position; }
+}
+return 0;
+"""
+
 def get_driver():
     chrome_options = Options()
     chrome_options.add_argument("--headless")
@@ -30,10 +112,20 @@ def get_driver():
     return driver
 
 
+# Rows are buffered and bulk-upserted instead of inserted one by one into
+# the configured store ($JUICE_STORE); with MongoDB every flush also folds
+# the new rows into the materialized stats summary
+juice_writer = None
+
+def get_writer():
+    global juice_writer
+    if juice_writer is None:
+        on_flush = update_summary if isinstance(get_store(), MongoStore) else None
+        juice_writer = JuiceWriter(max_rows=500, max_seconds=5.0, on_flush=on_flush)
+    return juice_writer
+
 def dev_db(saver_d = {}):
-    from db_util import setter_juice
-    ret_got = setter_juice(saver_d)
-    return ret_got
+    get_writer().add(saver_d)
 
 # # def sanitize_url(string_to_sanitize =''):
 # #     return quote(string_to_sanitize)
@@ -62,111 +154,191 @@ def dev_db(saver_d = {}):
 # # print(sanitize_url('boka bakso.pdf'))
 # run_util()
 
-def driver_return():
+def extract_rows(driver, start_count, end_count):
+    # One execute_script call per page instead of 3-6 find_element calls per row
+    with metrics.timed('extract'):
+        result = driver.execute_script(EXTRACT_ROWS_JS, start_count, end_count, LIST_XPATH)
+    rows = result['rows']
+    metrics.count('rows', len(rows))
+    metrics.count('rows_without_comment', sum(1 for row in rows if 'comment' not in row))
+    metrics.count('lookup_failures', result['skipped'])
+    return rows
+
+def list_state(driver):
+    return driver.execute_script(LIST_STATE_JS, LIST_XPATH)
+
+def wait_for_rows(driver, min_rows, previous=0, timeout=30):
+    # Polls the row count until min_rows payments are loaded, or until the
+    # list grew past previous and no "load more" follows it (the last, short
+    # page). Returns the list state at that point, or when timeout runs out,
+    # with timed_out set: the clicked "load more" is gone by then, so that is
+    # the only sign the rows are still loading rather than at their end.
+    def loaded(d):
+        state = list_state(d)
+        if state['rows'] >= min_rows or (state['rows'] > previous and not state['more']):
+            return state
+        return False
+    start = time.perf_counter()
+    try:
+        state = WebDriverWait(driver, timeout, poll_frequency=0.2).until(loaded)
+        state['timed_out'] = False
+        metrics.count('pages')
+    except TimeoutException:
+        state = list_state(driver)
+        state['timed_out'] = True
+        metrics.count('page_timeouts')
+    metrics.observe('page_load', time.perf_counter() - start)
+    return state
+
+def driver_return(timeout=60, url=BASE_URL):
     driver = get_driver()
-    driver.get(BASE_URL)
+    driver.get(url)
     driver.implicitly_wait(1)
-    time.sleep(20)
+    wait_for_rows(driver, 1, timeout=timeout)
     return driver
 
-def get_comments(start_count, end_count, driver):
-    for div_index in range(start_count, end_count+1):
-        end_loop = False
-        if div_index == end_count:
-            end_loop = True
-        else:
-            container_xpath = f'//*[@id="root"]/section/main/div/div[1]/div[3]/div[2]/div/div[2]/div[{div_index}]/div[2]/span/span'
-            end_loop = False
-
-        try:
-            container_elem = driver.find_element(By.XPATH, container_xpath)
-            comment_text = container_elem.text
-
-            amount_xpath = f'//*[@id="root"]/section/main/div/div[1]/div[3]/div[2]/div/div[2]/div[{div_index}]/div[1]/div[1]/div[2]'
-            link_xpath = f'//*[@id="root"]/section/main/div/div[1]/div[3]/div[2]/div/div[2]/div[{div_index}]/div[1]/div[2]/div[1]/a'
-            amount_elem = driver.find_element(By.XPATH, amount_xpath)
-            link_elem = driver.find_element(By.XPATH, link_xpath)
-            link_text = link_elem.get_attribute('href')
-            amount_text = amount_elem.text
-            # print(f'\nidx:{div_index}\nComment:{comment_text}')
-            saver_d = {'comment':comment_text, 'amount': amount_text, 'link':link_text}
-            dev_db(saver_d)
-        except Exception as e:
-            # print(e)
-            amount_xpath = f'//*[@id="root"]/section/main/div/div[1]/div[3]/div[2]/div/div[2]/div[{div_index}]/div[1]/div[1]/div[2]'
-            link_xpath = f'//*[@id="root"]/section/main/div/div[1]/div[3]/div[2]/div/div[2]/div[{div_index}]/div[1]/div[2]/div[1]/a'
-            amount_elem = driver.find_element(By.XPATH, amount_xpath)
-            link_elem = driver.find_element(By.XPATH, link_xpath)
-            link_text = link_elem.get_attribute('href')
-            amount_text = amount_elem.text
-            saver_d = {'amount': amount_text, 'link':link_text}
-            dev_db(saver_d)
-        
-        if end_loop:
-            container_xpath = f'//*[@id="root"]/section/main/div/div[1]/div[3]/div[2]/div/div[2]/div[{end_count+1}]'
-            container_elem = driver.find_element(By.XPATH, container_xpath)
-            container_elem.click()
-            time.sleep(10)
-
-            start_count = end_count+1
-            end_count = end_count + 50
-            # Call this recursively
-            if end_count < 1350:
-                get_comments(start_count, end_count, driver)
-            else:
-                driver.close()
-
-# get_comments(1,50,driver_return())
-
-def get_comments_2(start_count, end_count, driver):
-    for div_index in range(start_count, end_count+1):
-        print(div_index)
-        end_loop = False
-        if div_index == end_count:
-            end_loop = True
-        else:
-            container_xpath = f'//*[@id="root"]/section/main/div/div[1]/div[3]/div[2]/div/div[2]/div[{div_index}]/div[2]/span/span'
-            end_loop = False
-        if start_count > 4000:
-            try:
-                container_elem = driver.find_element(By.XPATH, container_xpath)
-                comment_text = container_elem.text
-
-                amount_xpath = f'//*[@id="root"]/section/main/div/div[1]/div[3]/div[2]/div/div[2]/div[{div_index}]/div[1]/div[1]/div[2]'
-                link_xpath = f'//*[@id="root"]/section/main/div/div[1]/div[3]/div[2]/div/div[2]/div[{div_index}]/div[1]/div[2]/div[1]/a'
-                amount_elem = driver.find_element(By.XPATH, amount_xpath)
-                link_elem = driver.find_element(By.XPATH, link_xpath)
-                link_text = link_elem.get_attribute('href')
-                amount_text = amount_elem.text
-                # print(f'\nidx:{div_index}\nComment:{comment_text}')
-                saver_d = {'comment':comment_text, 'amount': amount_text, 'link':link_text}
-                dev_db(saver_d)
-            except Exception as e:
-                # print(e)
-                amount_xpath = f'//*[@id="root"]/section/main/div/div[1]/div[3]/div[2]/div/div[2]/div[{div_index}]/div[1]/div[1]/div[2]'
-                link_xpath = f'//*[@id="root"]/section/main/div/div[1]/div[3]/div[2]/div/div[2]/div[{div_index}]/div[1]/div[2]/div[1]/a'
-                amount_elem = driver.find_element(By.XPATH, amount_xpath)
-                link_elem = driver.find_element(By.XPATH, link_xpath)
-                link_text = link_elem.get_attribute('href')
-                amount_text = amount_elem.text
-                saver_d = {'amount': amount_text, 'link':link_text}
-                dev_db(saver_d)
-            
-        if end_loop:
-            container_xpath = f'//*[@id="root"]/section/main/div/div[1]/div[3]/div[2]/div/div[2]/div[{end_count+1}]'
-            container_elem = driver.find_element(By.XPATH, container_xpath)
-            container_elem.click()
-            time.sleep(7)
-
-            start_count = end_count+1
-            end_count = end_count + 50
-            # Call this recursively
-            if end_count < 10050:
-                get_comments_2(start_count, end_count, driver)
-            else:
-                driver.close()
-
-get_comments_2(1, 50, driver_return())
+def load_rows(driver, min_rows, page_size=50, timeout=30):
+    # Clicks "load more" until at least min_rows payments are loaded or the
+    # list ends, without reading any of them. Returns the list state.
+    state = list_state(driver)
+    while state['rows'] < min_rows and state['more']:
+        driver.find_element(By.XPATH, f'{LIST_XPATH}/div[{state["rows"]+1}]').click()
+        metrics.count('load_more_clicks')
+        previous = state['rows']
+        state = wait_for_rows(driver, previous + page_size, previous=previous, timeout=timeout)
+        if state['rows'] <= previous:
+            break
+    return state
+
+def scrape_slice(driver, first_row, last_row, page_size=50, timeout=30):
+    # Returns rows first_row..last_row (1-based, inclusive), fewer only if the
+    # list ends before last_row. Rows already loaded by the driver are not
+    # reloaded. Raises TimeoutException when rows stop loading before the
+    # list ends ("load more" still there, or clicked and its page not shown
+    # within timeout), so a slow page isn't mistaken for the end of the list.
+    state = load_rows(driver, last_row, page_size=page_size, timeout=timeout)
+    if state['rows'] < last_row and (state['more'] or state.get('timed_out')):
+        raise TimeoutException(f'Rows stopped loading at {state["rows"]} of {last_row}')
+    if state['rows'] < first_row:
+        return []
+    return extract_rows(driver, first_row, min(last_row, state['rows']))
+
+def find_row(driver, link):
+    return driver.execute_script(FIND_ROW_JS, link, LIST_XPATH)
+
+def resume_row(driver, saved, page_size=50, timeout=30):
+    # Where an interrupted walk left off. The list is newest first, so
+    # payments made since then push the last saved row further down: its
+    # saved link is looked up in the loaded rows, loading more pages until it
+    # shows up. Falls back to the saved row count when the checkpoint has no
+    # link or the list ends without it. Returns the row and the list state.
+    state = load_rows(driver, saved['rows'], page_size=page_size, timeout=timeout)
+    link = saved.get('last_link')
+    if not link:
+        return saved['rows'], state
+    while True:
+        position = find_row(driver, link)
+        if position:
+            return position, state
+        if not state['more']:
+            break
+        previous = state['rows']
+        state = load_rows(driver, previous + page_size, page_size=page_size, timeout=timeout)
+        if state['rows'] <= previous:
+            break
+    print(f'Last saved row {link} not found, resuming by row count')
+    return saved['rows'], state
+
+def scrape_comments(driver, page_size=50, skip_rows=0, max_rows=None, timeout=30,
+                    checkpoint=None, resume=True, stop_at_known=False):
+    # Walks the payments list page by page: saves the rows loaded so far,
+    # clicks "load more" and waits until the next page_size rows show up.
+    # Stops when the list has no "load more" left or a click loads nothing
+    # within timeout. The first skip_rows rows are paged through without
+    # being saved. Returns the number of rows loaded.
+    #
+    # checkpoint names a progress record kept in the database. After every
+    # page the rows are flushed and the number of rows walked and the last tx
+    # link are saved under that name; the record is marked finished when the
+    # walk completes. With resume, an unfinished record makes the walk click
+    # straight through the rows it covers instead of reading them again; the
+    # saved link (see resume_row) places the resume point, so payments made
+    # in the meantime don't shift it.
+    # With stop_at_known the walk stops at the first page whose rows are all
+    # stored already: the list is newest first, so a daily run only reads the
+    # payments made since the last one.
+    writer = get_writer()
+    saved = load_scrape_state(checkpoint) if checkpoint and resume else None
+    if saved and not saved.get('finished') and saved.get('rows'):
+        resume_at, state = resume_row(driver, saved, page_size=page_size, timeout=timeout)
+        if resume_at != saved['rows']:
+            print(f'Last saved row moved from {saved["rows"]} to {resume_at} since the checkpoint')
+        skip_rows = max(skip_rows, resume_at)
+        print(f'Resuming after row {skip_rows} (last saved {saved.get("last_link")})')
+    else:
+        state = list_state(driver)
+    done = 0
+    finished = False
+    while True:
+        loaded = state['rows']
+        if max_rows is not None:
+            loaded = min(loaded, max_rows)
+        if loaded > max(done, skip_rows):
+            rows = extract_rows(driver, max(done, skip_rows)+1, loaded)
+            stored = known_links(row['link'] for row in rows) if stop_at_known else set()
+            for row in rows:
+                if row['link'] not in stored:
+                    dev_db(row)
+            if checkpoint:
+                writer.flush()
+                save_scrape_state(checkpoint, {'rows': loaded, 'last_link': rows[-1]['link'] if rows else None,
+                                               'finished': False})
+            if rows and len(stored) == len(rows):
+                print(f'Rows {max(done, skip_rows)+1}-{loaded} are already stored, stopping')
+                finished = True
+                break
+        if loaded > done:
+            print(f'Rows {done+1}-{loaded}')
+        done = loaded
+
+        if max_rows is not None and done >= max_rows:
+            break
+        if not state['more']:
+            finished = True
+            break
+        driver.find_element(By.XPATH, f'{LIST_XPATH}/div[{state["rows"]+1}]').click()
+        metrics.count('load_more_clicks')
+        previous = state['rows']
+        state = wait_for_rows(driver, previous + page_size, previous=previous, timeout=timeout)
+        if state['rows'] <= previous:
+            print(f'No rows loaded after row {previous} within {timeout}s, stopping')
+            break
 
+    writer.flush()
+    if checkpoint and finished:
+        saved = load_scrape_state(checkpoint) or {}
+        save_scrape_state(checkpoint, dict(saved, finished=True))
+    return done
 
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scrape the Juicebox payments list into the database')
+    parser.add_argument('--restart', action='store_true', help='ignore an unfinished checkpoint and start at the top')
+    parser.add_argument('--incremental', action='store_true', help='stop at the first page that is already stored')
+    parser.add_argument('--store', help=f'mongodb://, sqlite:/// or parquet:/// URL (default: ${STORE_ENV} or the local mongod)')
+    parser.add_argument('--metrics', help='file to write a metrics snapshot to while scraping')
+    parser.add_argument('--metrics-format', choices=['json', 'prometheus'], default='json')
+    parser.add_argument('--metrics-interval', type=float, default=10.0, help='seconds between snapshots')
+    args = parser.parse_args()
+    if args.store:
+        set_store(open_store(args.store))
+    if args.metrics:
+        metrics.start_reporter(args.metrics, fmt=args.metrics_format, interval=args.metrics_interval)
 
+    driver = driver_return()
+    try:
+        scrape_comments(driver, page_size=50, checkpoint='constitutiondao', resume=not args.restart,
+                        stop_at_known=args.incremental)
+    finally:
+        driver.quit()
+        metrics.stop_reporter(args.metrics, fmt=args.metrics_format)
+        print(metrics.summary())
@@ -0,0 +1,166 @@
+import argparse
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scrap_util import BASE_URL, driver_return, scrape_slice, get_writer
+from db_util import set_store
+from storage import open_store, STORE_ENV
+from metrics import metrics
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'payments.html')
+
+
+def quit_driver(driver):
+    if driver is None:
+        return
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+def merge_slices(results, last_slice=None):
+    # Joins the slices in list order, keeping the first row of every tx link
+    rows = []
+    seen = set()
+    for k in sorted(results):
+        if last_slice is not None and k > last_slice:
+            break
+        for row in results[k]:
+            if row['link'] in seen:
+                continue
+            seen.add(row['link'])
+            rows.append(row)
+    return rows
+
+
+def scrape_pool(url=BASE_URL, browsers=4, slice_rows=500, page_size=50, timeout=30, retries=2,
+                make_driver=None):
+    # Scrapes the payments list with several headless browsers at once.
+    # The list is cut into slices of slice_rows rows; every browser takes the
+    # next free slice, loads the list up to its end and reads just that slice.
+    # Slices handed to one browser only ever move down the list, so it keeps
+    # the rows it has loaded and goes on clicking from there. A slice that
+    # comes back short marks the end of the list; later slices are dropped.
+    # A browser that fails, or whose rows stop loading while "load more" is
+    # still there (scrape_slice raises), is replaced by a fresh one and the
+    # slice retried, up to retries times. Returns the rows in list order, deduplicated by link,
+    # i.e. the same rows a single browser walking the whole list would return.
+    if make_driver is None:
+        make_driver = lambda page_url: driver_return(timeout=timeout*2, url=page_url)
+    lock = threading.Lock()
+    next_slice = itertools.count()
+    results = {}
+    state = {'last_slice': None, 'failed': False}
+
+    def worker(number):
+        driver = None
+        try:
+            while True:
+                with lock:
+                    k = next(next_slice)
+                    if state['failed'] or (state['last_slice'] is not None and k > state['last_slice']):
+                        return
+                first_row, last_row = k*slice_rows + 1, (k+1)*slice_rows
+                for attempt in range(retries+1):
+                    try:
+                        if driver is None:
+                            driver = make_driver(url)
+                        rows = scrape_slice(driver, first_row, last_row, page_size=page_size, timeout=timeout)
+                        break
+                    except Exception as e:
+                        metrics.count('browser_restarts')
+                        print(f'Browser {number} failed on rows {first_row}-{last_row}: {e}')
+                        quit_driver(driver)
+                        driver = None
+                        if attempt == retries:
+                            with lock:
+                                state['failed'] = True
+                            raise
+                        print(f'Browser {number} restarting, retry {attempt+1} of {retries}')
+                if rows:
+                    print(f'Browser {number}: rows {first_row}-{first_row+len(rows)-1}')
+                with lock:
+                    results[k] = rows
+                    if len(rows) < slice_rows and (state['last_slice'] is None or k < state['last_slice']):
+                        state['last_slice'] = k
+        finally:
+            quit_driver(driver)
+
+    with ThreadPoolExecutor(max_workers=browsers) as pool:
+        futures = [pool.submit(worker, number) for number in range(1, browsers+1)]
+        for future in futures:
+            future.result()
+    return merge_slices(results, state['last_slice'])
+
+
+def fixture_url(rows=237, page_size=50, delay=300):
+    return f'file://{FIXTURE_PATH}?rows={rows}&page={page_size}&delay={delay}'
+
+
+def check_fixture(browsers=3, rows=437, slice_rows=100, page_size=50):
+    # Scrapes the local fixture page once with a single browser and once with
+    # the pool, crashing one pool browser on purpose, and compares the rows
+    url = fixture_url(rows=rows, page_size=page_size)
+    start = time.perf_counter()
+    driver = driver_return(url=url)
+    try:
+        serial = scrape_slice(driver, 1, rows + page_size, page_size=page_size)
+    finally:
+        quit_driver(driver)
+    serial_seconds = time.perf_counter() - start
+
+    opened = itertools.count(1)
+
+    def crashing_driver(page_url):
+        driver = driver_return(url=page_url)
+        if next(opened) == 2:
+            # Kill the second browser shortly after it starts its slice
+            threading.Timer(0.5, quit_driver, [driver]).start()
+        return driver
+
+    start = time.perf_counter()
+    pooled = scrape_pool(url, browsers=browsers, slice_rows=slice_rows, page_size=page_size, timeout=10,
+                         make_driver=crashing_driver)
+    pool_seconds = time.perf_counter() - start
+
+    print(f'Serial: {len(serial)} rows in {serial_seconds:.1f}s, pool: {len(pooled)} rows in {pool_seconds:.1f}s')
+    if pooled != serial or len(serial) != rows:
+        print('Pool rows differ from the serial run')
+        return False
+    print('Pool rows match the serial run')
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scrape the Juicebox payments list with several browsers')
+    parser.add_argument('--browsers', type=int, default=4)
+    parser.add_argument('--slice-rows', type=int, default=500)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--fixture', action='store_true', help='check the pool against fixtures/payments.html instead')
+    parser.add_argument('--store', help=f'mongodb://, sqlite:/// or parquet:/// URL (default: ${STORE_ENV} or the local mongod)')
+    parser.add_argument('--metrics', help='file to write a metrics snapshot to while scraping')
+    parser.add_argument('--metrics-format', choices=['json', 'prometheus'], default='json')
+    parser.add_argument('--metrics-interval', type=float, default=10.0, help='seconds between snapshots')
+    args = parser.parse_args()
+    if args.store:
+        set_store(open_store(args.store))
+
+    if args.fixture:
+        ok = check_fixture(browsers=args.browsers)
+        raise SystemExit(0 if ok else 1)
+
+    if args.metrics:
+        metrics.start_reporter(args.metrics, fmt=args.metrics_format, interval=args.metrics_interval)
+    try:
+        writer = get_writer()
+        for row in scrape_pool(browsers=args.browsers, slice_rows=args.slice_rows, page_size=args.page_size):
+            writer.add(row)
+        writer.close()
+        print(f'Saved {writer.written} rows')
+    finally:
+        metrics.stop_reporter(args.metrics, fmt=args.metrics_format)
+        print(metrics.summary())
@@ -0,0 +1,185 @@
+import argparse
+import bisect
+import json
+import math
+from datetime import datetime
+import db_util
+from storage import MongoStore
+
+SUMMARY_ID = 'comments'
+
+# Upper bound of each amount bucket in ETH; the first bucket starts at 0
+BUCKET_BOUNDS = [0.01, 0.05, 0.1, 0.5, 1, 5, 10, 100, math.inf]
+
+# 'Ξ1,234.5' -> 1234.5 on the server; null when it doesn't parse
+AMOUNT_ETH = {'$convert': {
+    'input': {'$trim': {'input': {'$replaceAll': {
+        'input': {'$replaceAll': {'input': {'$ifNull': ['$amount', '']}, 'find': 'Ξ', 'replacement': ''}},
+        'find': ',', 'replacement': ''}}}},
+    'to': 'double', 'onError': None, 'onNull': None}}
+
+HAS_COMMENT = {'$gt': [{'$strLenCP': {'$trim': {'input': {'$ifNull': ['$comment', '']}}}}, 0]}
+
+
+def mongo_store():
+    # The pipelines run inside MongoDB, so the other stores have no stats
+    store = db_util.get_store()
+    if not isinstance(store, MongoStore):
+        raise ValueError(f'Stats need the MongoDB store, {type(store).__name__} is configured')
+    return store
+
+def comments_collection():
+    return mongo_store().collection
+
+def summary_collection():
+    return mongo_store().database['comments_summary']
+
+def parse_amount(text):
+    # Same parsing as AMOUNT_ETH, for rows that are still in Python
+    try:
+        value = float(str(text).replace('Ξ', '').replace(',', '').strip())
+    except ValueError:
+        return None
+    return value if math.isfinite(value) else None
+
+def has_comment(row):
+    return bool((row.get('comment') or '').strip())
+
+def bucket_index(amount):
+    lower = [0] + BUCKET_BOUNDS[:-1]
+    if amount is None or amount < 0:
+        return None
+    return bisect.bisect_right(lower, amount) - 1
+
+def totals():
+    # Count, total, min, max and mean ETH and the rows with a comment, in one pass
+    pipeline = [
+        {'$project': {'_id': False, 'amount_eth': AMOUNT_ETH, 'has_comment': HAS_COMMENT}},
+        {'$group': {
+            '_id': None,
+            'count': {'$sum': 1},
+            'priced': {'$sum': {'$cond': [{'$ne': ['$amount_eth', None]}, 1, 0]}},
+            'with_comment': {'$sum': {'$cond': ['$has_comment', 1, 0]}},
+            'total_eth': {'$sum': '$amount_eth'},
+            'min_eth': {'$min': '$amount_eth'},
+            'max_eth': {'$max': '$amount_eth'},
+            'mean_eth': {'$avg': '$amount_eth'},
+        }},
+        {'$project': {'_id': False}},
+    ]
+    result = list(comments_collection().aggregate(pipeline))
+    if not result:
+        return {'count': 0, 'priced': 0, 'with_comment': 0, 'total_eth': 0.0, 'min_eth': None, 'max_eth': None, 'mean_eth': None}
+    return result[0]
+
+def median_amount():
+    # Sorts the parsed amounts on the server and reads only the middle one or two
+    base = [
+        {'$project': {'_id': False, 'amount_eth': AMOUNT_ETH}},
+        {'$match': {'amount_eth': {'$ne': None}}},
+    ]
+    counted = list(comments_collection().aggregate(base + [{'$count': 'n'}]))
+    n = counted[0]['n'] if counted else 0
+    if n == 0:
+        return None
+    middle = base + [{'$sort': {'amount_eth': 1}}, {'$skip': (n - 1) // 2}, {'$limit': 2 - n % 2}]
+    values = [doc['amount_eth'] for doc in comments_collection().aggregate(middle, allowDiskUse=True)]
+    return sum(values) / len(values)
+
+def amount_buckets():
+    # Number of payments and ETH per amount bucket
+    boundaries = [0] + BUCKET_BOUNDS
+    pipeline = [
+        {'$project': {'_id': False, 'amount_eth': AMOUNT_ETH}},
+        {'$bucket': {'groupBy': '$amount_eth', 'boundaries': boundaries, 'default': 'other',
+                     'output': {'count': {'$sum': 1}, 'total_eth': {'$sum': '$amount_eth'}}}},
+    ]
+    found = {doc['_id']: doc for doc in comments_collection().aggregate(pipeline)}
+    buckets = []
+    for low, high in zip(boundaries, boundaries[1:]):
+        doc = found.get(low, {})
+        buckets.append({'min_eth': low, 'max_eth': None if math.isinf(high) else high,
+                        'count': doc.get('count', 0), 'total_eth': doc.get('total_eth', 0.0)})
+    other = found.get('other', {}).get('count', 0)
+    return buckets, other
+
+def compute_summary():
+    summary = totals()
+    summary['median_eth'] = median_amount()
+    summary['median_stale'] = False
+    summary['buckets'], summary['unbucketed'] = amount_buckets()
+    return summary
+
+def refresh_summary():
+    # Recomputes the materialized summary from the whole collection
+    summary = compute_summary()
+    summary['updated_at'] = datetime.utcnow()
+    summary_collection().replace_one({'_id': SUMMARY_ID}, summary, upsert=True)
+    return summary
+
+def update_summary(new_rows):
+    # Folds rows that were just inserted into the materialized summary with
+    # one $inc instead of recomputing it. Only new rows may be passed: rows
+    # re-scraped in place are already counted. The median can't be updated
+    # incrementally, so it is only marked stale here and recomputed when the
+    # summary is read.
+    if not new_rows:
+        return
+    if summary_collection().find_one({'_id': SUMMARY_ID}, projection={'_id': True}) is None:
+        refresh_summary()
+        return
+    inc = {'count': 0, 'priced': 0, 'with_comment': 0, 'total_eth': 0.0, 'unbucketed': 0}
+    amounts = []
+    for row in new_rows:
+        amount = parse_amount(row.get('amount'))
+        inc['count'] += 1
+        inc['with_comment'] += has_comment(row)
+        index = bucket_index(amount)
+        if index is None:
+            inc['unbucketed'] += 1
+        else:
+            inc[f'buckets.{index}.count'] = inc.get(f'buckets.{index}.count', 0) + 1
+            inc[f'buckets.{index}.total_eth'] = inc.get(f'buckets.{index}.total_eth', 0.0) + amount
+        if amount is not None:
+            inc['priced'] += 1
+            inc['total_eth'] += amount
+            amounts.append(amount)
+    summary_collection().update_one({'_id': SUMMARY_ID}, {'$inc': inc, '$set': {'updated_at': datetime.utcnow()}})
+    # The mean follows from the new totals; an update pipeline computes it in
+    # place. min_eth / max_eth are null while nothing was priced, and null
+    # sorts below every number, so a plain $min update would keep it forever
+    fields = {
+        'mean_eth': {'$cond': [{'$gt': ['$priced', 0]}, {'$divide': ['$total_eth', '$priced']}, None]},
+    }
+    if amounts:
+        fields['min_eth'] = {'$min': [{'$ifNull': ['$min_eth', min(amounts)]}, min(amounts)]}
+        fields['max_eth'] = {'$max': [{'$ifNull': ['$max_eth', max(amounts)]}, max(amounts)]}
+        fields['median_stale'] = True
+    summary_collection().update_one({'_id': SUMMARY_ID}, [{'$set': fields}])
+
+def read_summary():
+    # The materialized summary, computed first if there is none yet; a median
+    # left stale by update_summary is recomputed (two aggregations) and saved
+    summary = summary_collection().find_one({'_id': SUMMARY_ID}, projection={'_id': False})
+    if summary is None:
+        summary = refresh_summary()
+        summary.pop('_id', None)
+    elif summary.get('median_stale'):
+        summary['median_eth'] = median_amount()
+        summary['median_stale'] = False
+        summary_collection().update_one({'_id': SUMMARY_ID},
+                                        {'$set': {'median_eth': summary['median_eth'], 'median_stale': False}})
+    return summary
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='ConstitutionDAO contribution stats')
+    parser.add_argument('--refresh', action='store_true', help='recompute the summary from the whole collection')
+    args = parser.parse_args()
+    from pymongo.errors import OperationFailure
+    try:
+        summary = refresh_summary() if args.refresh else read_summary()
+    except OperationFailure as e:
+        raise SystemExit(f'Aggregation failed (MongoDB 4.4 or newer is needed): {e}')
+    summary.pop('_id', None)
+    summary['share_with_comment'] = summary['with_comment'] / summary['count'] if summary['count'] else None
+    print(json.dumps(summary, indent=2, default=str, ensure_ascii=False))
@@ -0,0 +1,308 @@
+import glob
+import json
+import os
+import sqlite3
+from urllib.parse import urlparse, parse_qs
+
+# Where scraped payments are kept, e.g.
+#   mongodb://localhost:27017/juice?maxPoolSize=20
+#   sqlite:///juice.db
+#   parquet:///data/juice_parquet
+STORE_ENV = 'JUICE_STORE'
+DEFAULT_STORE = 'mongodb://localhost:27017/juice'
+
+COLUMNS = ['comment', 'amount', 'link']
+
+# Every store has the same methods:
+#   upsert_rows(rows)        store rows keyed on link, return the ones that were new
+#   iter_rows(fields, batch_size)   yield the stored rows in lists of batch_size
+#   known_links(links)       the subset of links that are already stored
+#   load_state(name) / save_state(name, state)   small JSON-able progress records
+#   drop()                   delete every stored row
+#   close()
+
+
+def dedupe_rows(rows):
+    # The last copy of every link; rows without a link are all kept
+    by_link = {}
+    for row in rows:
+        by_link[row.get('link') or id(row)] = row
+    return list(by_link.values())
+
+
+class MongoStore:
+    # One document per payment in database.collection, with a unique index on
+    # link. The client is created on first use, so constructing the store (or
+    # importing a module that does) doesn't need a running mongod. Needs
+    # pymongo, which the other stores don't.
+
+    def __init__(self, uri='mongodb://localhost:27017/', database='juice', collection='comments',
+                 max_pool_size=100, min_pool_size=0):
+        try:
+            import pymongo
+            from pymongo import errors
+        except ImportError:
+            raise ImportError('The MongoDB store needs pymongo: pip install pymongo')
+        self.pymongo, self.errors = pymongo, errors
+        self.uri = uri
+        self.database_name = database
+        self.collection_name = collection
+        self.max_pool_size = max_pool_size
+        self.min_pool_size = min_pool_size
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self.pymongo.MongoClient(self.uri, maxPoolSize=self.max_pool_size,
+                                                    minPoolSize=self.min_pool_size)
+            self.ensure_indexes()
+        return self._client
+
+    @property
+    def database(self):
+        return self.client[self.database_name]
+
+    @property
+    def collection(self):
+        return self.database[self.collection_name]
+
+    def ensure_indexes(self):
+        # One document per transaction: the etherscan link carries the tx hash
+        collection = self._client[self.database_name][self.collection_name]
+        # Partial, so rows scraped without a link don't all collide on null
+        options = {'unique': True, 'name': 'link_unique', 'partialFilterExpression': {'link': {'$type': 'string'}}}
+        try:
+            existing = collection.index_information().get('link_unique')
+            if existing is not None and 'partialFilterExpression' not in existing:
+                # Created before the index was partial; replace it, or
+                # link-less rows keep colliding on null
+                collection.drop_index('link_unique')
+            collection.create_index('link', **options)
+            return True
+        except self.errors.OperationFailure as e:
+            # Collections filled by the old insert_one path can hold duplicates
+            print(f'Could not create the unique link index, remove the duplicates first: {e}')
+            return False
+
+    def upsert_rows(self, rows):
+        # One unordered bulk write; rows with a known link are updated in place
+        rows = dedupe_rows(rows)
+        if not rows:
+            return []
+        requests = []
+        for row in rows:
+            if row.get('link'):
+                requests.append(self.pymongo.UpdateOne({'link': row['link']}, {'$set': row}, upsert=True))
+            else:
+                requests.append(self.pymongo.InsertOne(row))
+        try:
+            result = self.collection.bulk_write(requests, ordered=False)
+            upserted = set(result.upserted_ids)
+        except self.errors.BulkWriteError as e:
+            # Only an upsert racing another writer inserting the same new link
+            # may fail on the key: the link is stored by then, so retrying
+            # turns it into an update. Any other failure, a link-less insert
+            # included, is raised rather than dropped.
+            errors = e.details['writeErrors']
+            raced = [err['index'] for err in errors
+                     if err['code'] == 11000 and isinstance(requests[err['index']], self.pymongo.UpdateOne)]
+            if len(raced) < len(errors):
+                raise
+            upserted = {item['index'] for item in e.details['upserted']}
+            self.collection.bulk_write([requests[index] for index in raced], ordered=False)
+        return [row for index, row in enumerate(rows)
+                if index in upserted or isinstance(requests[index], self.pymongo.InsertOne)]
+
+    def iter_rows(self, fields=None, batch_size=1000, query=None):
+        projection = {field: True for field in fields} if fields else {}
+        projection['_id'] = False
+        cursor = self.collection.find(query or {}, projection=projection, batch_size=batch_size)
+        batch = []
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def known_links(self, links):
+        cursor = self.collection.find({'link': {'$in': list(links)}}, projection={'link': True, '_id': False})
+        return {doc['link'] for doc in cursor}
+
+    def load_state(self, name):
+        return self.database['scrape_state'].find_one({'_id': name}, projection={'_id': False})
+
+    def save_state(self, name, state):
+        self.database['scrape_state'].replace_one({'_id': name}, dict(state), upsert=True)
+
+    def drop(self):
+        self.collection.drop()
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+class SQLiteStore:
+    # A single-file store for small runs and tests: a comments table with a
+    # unique link column and a scrape_state table of JSON records
+
+    def __init__(self, path='juice.db'):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS comments (comment TEXT, amount TEXT, link TEXT UNIQUE)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS scrape_state (name TEXT PRIMARY KEY, state TEXT)')
+        self.conn.commit()
+
+    def upsert_rows(self, rows):
+        rows = dedupe_rows(rows)
+        if not rows:
+            return []
+        with self.conn:
+            known = self.known_links(row['link'] for row in rows if row.get('link'))
+            # A missing comment leaves a stored one alone, like $set in Mongo
+            self.conn.executemany(
+                'INSERT INTO comments (comment, amount, link) VALUES (?, ?, ?) '
+                'ON CONFLICT(link) DO UPDATE SET amount = excluded.amount, '
+                'comment = COALESCE(excluded.comment, comment)',
+                [(row.get('comment'), row.get('amount'), row.get('link')) for row in rows])
+        return [row for row in rows if row.get('link') not in known]
+
+    def iter_rows(self, fields=None, batch_size=1000):
+        fields = [field for field in (fields or COLUMNS) if field in COLUMNS]
+        cursor = self.conn.execute(f'SELECT {", ".join(fields)} FROM comments ORDER BY rowid')
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            # Leave out missing values the way Mongo leaves out missing fields
+            yield [{field: value for field, value in zip(fields, values) if value is not None}
+                   for values in batch]
+
+    def known_links(self, links):
+        links = list(links)
+        known = set()
+        for start in range(0, len(links), 500):
+            chunk = links[start:start+500]
+            cursor = self.conn.execute(
+                f'SELECT link FROM comments WHERE link IN ({", ".join("?" * len(chunk))})', chunk)
+            known.update(link for link, in cursor)
+        return known
+
+    def load_state(self, name):
+        row = self.conn.execute('SELECT state FROM scrape_state WHERE name = ?', (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_state(self, name, state):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO scrape_state (name, state) VALUES (?, ?)',
+                              (name, json.dumps(state, default=str)))
+
+    def drop(self):
+        with self.conn:
+            self.conn.execute('DELETE FROM comments')
+
+    def close(self):
+        self.conn.close()
+
+
+class ParquetStore:
+    # Append-only columnar files: every upsert_rows call writes the rows whose
+    # link isn't stored yet to a new part-NNNNN.parquet in the directory.
+    # Stored rows are never rewritten, so a re-scraped link keeps its first
+    # copy. The links of the existing parts are read (that column only) once,
+    # when the store is opened. Needs pyarrow.
+
+    def __init__(self, directory='juice_parquet'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError('The Parquet store needs pyarrow: pip install pyarrow')
+        self.pa, self.pq = pa, pq
+        self.directory = directory
+        self.schema = pa.schema([('comment', pa.string()), ('amount', pa.string()), ('link', pa.string())])
+        os.makedirs(directory, exist_ok=True)
+        self.links = set()
+        for part in self.parts():
+            self.links.update(link for link in pq.read_table(part, columns=['link']).column('link').to_pylist() if link)
+        self.next_part = len(self.parts())
+
+    def parts(self):
+        return sorted(glob.glob(os.path.join(self.directory, 'part-*.parquet')))
+
+    def upsert_rows(self, rows):
+        new_rows = [row for row in dedupe_rows(rows) if not row.get('link') or row['link'] not in self.links]
+        if not new_rows:
+            return []
+        table = self.pa.Table.from_pylist([{column: row.get(column) for column in COLUMNS} for row in new_rows],
+                                          schema=self.schema)
+        path = os.path.join(self.directory, f'part-{self.next_part:05d}.parquet')
+        # Written under a temporary name so readers never see a partial part
+        self.pq.write_table(table, path + '.tmp')
+        os.replace(path + '.tmp', path)
+        self.next_part += 1
+        self.links.update(row['link'] for row in new_rows if row.get('link'))
+        return new_rows
+
+    def iter_rows(self, fields=None, batch_size=1000):
+        fields = [field for field in (fields or COLUMNS) if field in COLUMNS]
+        for part in self.parts():
+            for record_batch in self.pq.ParquetFile(part).iter_batches(batch_size=batch_size, columns=fields):
+                yield [{field: value for field, value in row.items() if value is not None}
+                       for row in record_batch.to_pylist()]
+
+    def known_links(self, links):
+        return {link for link in links if link in self.links}
+
+    def state_path(self, name):
+        return os.path.join(self.directory, f'_state_{name}.json')
+
+    def load_state(self, name):
+        if not os.path.exists(self.state_path(name)):
+            return None
+        with open(self.state_path(name)) as f:
+            return json.load(f)
+
+    def save_state(self, name, state):
+        path = self.state_path(name)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(state, f, default=str)
+        os.replace(path + '.tmp', path)
+
+    def drop(self):
+        for part in self.parts():
+            os.remove(part)
+        self.links = set()
+        self.next_part = 0
+
+    def close(self):
+        pass
+
+
+def open_store(url=None):
+    # Opens the store named by url, or by $JUICE_STORE, defaulting to the
+    # local mongod. For Mongo, the database is the URL path (default juice),
+    # the collection the 'collection' query parameter (default comments), and
+    # the pool is sized with maxPoolSize / minPoolSize.
+    url = url or os.environ.get(STORE_ENV) or DEFAULT_STORE
+    parsed = urlparse(url)
+    if parsed.scheme in ('mongodb', 'mongodb+srv'):
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        database = parsed.path.strip('/') or 'juice'
+        collection = query.pop('collection', 'comments')
+        max_pool_size = int(query.pop('maxPoolSize', 100))
+        min_pool_size = int(query.pop('minPoolSize', 0))
+        rest = '&'.join(f'{key}={value}' for key, value in query.items())
+        uri = parsed._replace(path='/', query=rest).geturl()
+        return MongoStore(uri, database=database, collection=collection,
+                          max_pool_size=max_pool_size, min_pool_size=min_pool_size)
+    if parsed.scheme == 'sqlite':
+        return SQLiteStore(url[len('sqlite:///'):] or 'juice.db')
+    if parsed.scheme == 'parquet':
+        return ParquetStore(url[len('parquet:///'):] or 'juice_parquet')
+    raise ValueError(f'Unknown store {url!r}, use a mongodb://, sqlite:/// or parquet:/// URL')